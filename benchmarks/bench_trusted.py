@@ -0,0 +1,70 @@
+"""Compares the time to render an attribute-heavy template in the default
+sandbox and with `trusted=True`.
+
+Run it with `python benchmarks/bench_trusted.py [ROWS]`.
+"""
+from collections import namedtuple
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import sys
+import timeit
+
+from hecto.utils import JinjaRender
+
+
+TEMPLATE = """
+[% for row in rows %]
+[[ row.name ]] [[ row.owner.name|upper ]] [[ row.owner.email ]]
+[%- for tag in row.tags %] [[ tag.name ]]:[[ tag.value ]][% endfor %]
+[[ row.items() | length ]]
+[% endfor %]
+"""
+
+Owner = namedtuple("Owner", "name email")
+Tag = namedtuple("Tag", "name value")
+
+
+class Row(dict):
+    def __getattr__(self, name):
+        return self[name]
+
+
+def make_rows(count):
+    return [
+        Row(
+            name=f"row{i}",
+            owner=Owner(f"user{i}", f"user{i}@example.com"),
+            tags=[Tag(f"tag{j}", j) for j in range(10)],
+        )
+        for i in range(count)
+    ]
+
+
+def bench(src, rows, trusted, number=5):
+    envops = {
+        "block_start_string": "[%",
+        "block_end_string": "%]",
+        "variable_start_string": "[[",
+        "variable_end_string": "]]",
+    }
+    render = JinjaRender(src, {"rows": rows}, envops=envops, trusted=trusted)
+    path = src / "bench.txt.tmpl"
+    render(path)  # Compile it first
+    return min(timeit.repeat(lambda: render(path), number=number, repeat=3)) / number
+
+
+def main(count=2000):
+    rows = make_rows(count)
+    with TemporaryDirectory() as tmp:
+        src = Path(tmp)
+        (src / "bench.txt.tmpl").write_text(TEMPLATE)
+        sandboxed = bench(src, rows, trusted=False)
+        trusted = bench(src, rows, trusted=True)
+
+    print(f"{count} rows")
+    print(f"sandboxed: {sandboxed * 1000:8.2f} ms")
+    print(f"trusted:   {trusted * 1000:8.2f} ms  ({sandboxed / trusted:.2f}x faster)")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
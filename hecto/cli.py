@@ -0,0 +1,170 @@
+"""The `hecto` command line.
+
+    hecto copy SRC DST [-d KEY=VALUE ...] [--force | --skip] ...
+    hecto batch JOBS.jsonl [--workers N]
+
+Each line of the JSONL file of `hecto batch` is a job, like
+`{"src": "...", "dst": "...", "data": {...}, "options": {...}}`, where the
+options are any of the arguments of `hecto.copy()`.
+"""
+from argparse import ArgumentParser
+from collections import Counter
+from threading import Lock
+import json
+import sys
+import time
+
+from .main import COPY_FLAGS, copy, Renderer, Summary
+from .utils import make_executor
+
+
+__all__ = ("main", "run_jobs")
+
+# The actions of the files written, that count for the throughput
+WRITTEN = ("created", "extended", "updated")
+
+
+def main(args=None):
+    parser = make_parser()
+    args = parser.parse_args(args)
+    if not getattr(args, "command", None):
+        parser.print_help()
+        return 2
+    return args.command(args)
+
+
+def make_parser():
+    parser = ArgumentParser(prog="hecto", description="Render project templates.")
+    commands = parser.add_subparsers()
+
+    cmd = commands.add_parser("copy", help="Render a project template.")
+    cmd.add_argument("src", help="Path or URL of the project template.")
+    cmd.add_argument("dst", help="Where to render the project.")
+    cmd.add_argument(
+        "-d",
+        "--data",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="A value for the templates. Can be used many times.",
+    )
+    cmd.add_argument(
+        "--data-file", metavar="FILE", help="A JSON file with the data."
+    )
+    cmd.add_argument("--exclude", action="append", metavar="PATTERN")
+    cmd.add_argument("--include", action="append", metavar="PATTERN")
+    cmd.add_argument("--skip-if-exists", action="append", metavar="PATTERN")
+    for flag in COPY_FLAGS + ("trusted", ):
+        cmd.add_argument(f"--{flag}", action="store_true", default=None)
+    cmd.add_argument("--workers", type=int)
+    cmd.add_argument("--vcs-ref")
+    cmd.add_argument("--subdirectory")
+    cmd.add_argument("--copy-strategy")
+    cmd.set_defaults(command=run_copy)
+
+    cmd = commands.add_parser(
+        "batch", help="Render the jobs of a JSONL file (or - for stdin)."
+    )
+    cmd.add_argument("jobs", help="The JSONL file.")
+    cmd.add_argument(
+        "--workers", type=int, help="How many jobs to run at the same time."
+    )
+    cmd.set_defaults(command=run_batch)
+    return parser
+
+
+def run_copy(args):
+    data = {}
+    if args.data_file:
+        with open(args.data_file, encoding="utf8") as f:
+            data.update(json.load(f))
+    for item in args.data:
+        key, _, value = item.partition("=")
+        data[key] = value
+
+    options = {
+        key: value for key, value in vars(args).items()
+        if value is not None and key not in ("command", "src", "dst", "data")
+    }
+    options.pop("data_file", None)
+    copy(args.src, args.dst, data, **options)
+    return 0
+
+
+def run_batch(args):
+    if args.jobs == "-":
+        lines = list(sys.stdin)
+    else:
+        with open(args.jobs, encoding="utf8") as f:
+            lines = list(f)
+    jobs = [json.loads(line) for line in lines if line.strip()]
+
+    start = time.perf_counter()
+    summaries = []
+    for summary in run_jobs(jobs, workers=args.workers):
+        if summary.error:
+            print(f"{summary.dst_path}: {summary.error!r}", file=sys.stderr)
+        summaries.append(summary)
+    elapsed = time.perf_counter() - start
+
+    print_throughput(summaries, elapsed)
+    return 1 if any(summary.error for summary in summaries) else 0
+
+
+def run_jobs(jobs, workers=None):
+    """Runs the `jobs` (dicts with a "src", a "dst", and, optionally, "data"
+    and "options") with up to `workers` threads, and yields the `Summary`
+    of each one, in order.
+
+    The jobs with the same source and settings share a `Renderer`. By
+    default, the status output is disabled and the files that already exist
+    are skipped, because there is no one to ask. A job with `"skip": false`
+    and without `"force": true` fails with a `ValueError` for the same reason.
+    """
+    renderers = {}
+    lock = Lock()
+
+    def get_renderer(src, settings):
+        key = (src, json.dumps(settings, sort_keys=True, default=repr))
+        with lock:
+            if key not in renderers:
+                renderers[key] = Renderer(src, **settings)
+            return renderers[key]
+
+    def run(job):
+        dst = job.get("dst")
+        try:
+            settings = dict(job.get("options") or {})
+            flags = {key: settings.pop(key) for key in COPY_FLAGS if key in settings}
+            flags.setdefault("quiet", True)
+            flags.setdefault("skip", not flags.get("force"))
+            if not (flags["skip"] or flags.get("force")):
+                raise ValueError("A job can't ask about conflicts, use skip or force")
+            renderer = get_renderer(job["src"], settings)
+            return renderer.copy(dst, job.get("data"), **flags)
+        except Exception as e:
+            return Summary(dst, Counter(), 0, e)
+
+    try:
+        with make_executor(workers) as executor:
+            futures = [executor.submit(run, job) for job in jobs]
+            for future in futures:
+                yield future.result()
+    finally:
+        for renderer in renderers.values():
+            renderer.close()
+
+
+def print_throughput(summaries, elapsed):
+    """Only the jobs that succeeded and the files that were written count."""
+    elapsed = max(elapsed, 1e-9)
+    done = [summary for summary in summaries if not summary.error]
+    files = sum(
+        summary.actions[action] for summary in done for action in WRITTEN
+    )
+    size = sum(summary.size for summary in done)
+    print(
+        f"{len(summaries)} jobs ({len(summaries) - len(done)} failed), "
+        f"{files} files, {size} bytes written in {elapsed:.2f}s: "
+        f"{len(done) / elapsed:.1f} jobs/s, {files / elapsed:.1f} files/s"
+    )
@@ -0,0 +1,5 @@
+from .archive import *  # noqa
+from .base import *  # noqa
+from .index import *  # noqa
+from .local import *  # noqa
+from .memory import *  # noqa
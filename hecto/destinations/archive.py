@@ -0,0 +1,178 @@
+from pathlib import PurePosixPath
+from tempfile import SpooledTemporaryFile
+import io
+import os
+import shutil
+import stat
+import tarfile
+import threading
+import time
+import zipfile
+
+from .base import Destination
+
+
+__all__ = ("TarDestination", "ZipDestination")
+
+SPOOL_SIZE = 1024 * 1024
+
+
+class ArchiveDestination(Destination):
+    """Base class of the destinations that write the project to a stream.
+
+    The members are written in the order they are saved, and only once, so
+    nothing ever exists before it is written, and appending to a file already
+    written is not possible. The paths in the archive are prefixed by
+    `prefix`, that is also the `folder_name` of the project.
+    """
+
+    def __init__(self, prefix=""):
+        self.path = PurePosixPath(prefix)
+        self.prefix = str(prefix).strip("/")
+        self.mtime = time.time()
+        self.names = set()
+        self.lock = threading.Lock()
+
+    def get_name(self, rel_path):
+        name = PurePosixPath(self.prefix, *rel_path.parts)
+        return str(name).lstrip("/")
+
+    def exists(self, rel_path):
+        return self.get_name(rel_path) in self.names
+
+    def make_folder(self, rel_path):
+        name = self.get_name(rel_path)
+        if name in (".", ""):
+            return
+        with self.lock:
+            self.names.add(name)
+            self.add_folder(name)
+
+    def write_bytes(self, rel_path, data, mode=0o644):
+        self.write_file(rel_path, io.BytesIO(data), len(data), mode)
+
+    def append_bytes(self, rel_path, data):
+        if self.exists(rel_path):
+            raise ValueError(f"Can't append to {rel_path}, it's already written")
+        self.write_bytes(rel_path, data)
+
+    def write_file(self, rel_path, fileobj, size, mode=0o644):
+        """Writes `size` bytes read from `fileobj`, in chunks."""
+        name = self.get_name(rel_path)
+        with self.lock:
+            self.names.add(name)
+            self.add_file(name, fileobj, size, mode)
+
+    def copy_file(self, source, source_path, rel_path):
+        with source.open(source_path) as fileobj:
+            size = get_size(fileobj)
+            self.write_file(rel_path, fileobj, size, source.get_mode(source_path))
+        return size
+
+    def has_content(self, rel_path, data, digest=None):
+        return False
+
+    def is_identical(self, source, source_path, rel_path):
+        return False
+
+    def add_folder(self, name):
+        raise NotImplementedError
+
+    def add_file(self, name, fileobj, size, mode):
+        raise NotImplementedError
+
+
+def get_size(fileobj):
+    try:
+        return os.fstat(fileobj.fileno()).st_size
+    except (AttributeError, OSError):
+        pos = fileobj.tell()
+        size = fileobj.seek(0, io.SEEK_END)
+        fileobj.seek(pos)
+        return size
+
+
+class TarDestination(ArchiveDestination):
+    """Writes the project as a tar archive to `fileobj`, that can be any
+    writable file object (it doesn't need to be seekable).
+
+    The `mode` is the one used by `tarfile.open()`; by default, a
+    gzip-compressed stream. The size of each member must be known before
+    writing it, so the rendered files are spooled first (in memory, or to
+    a temporary file if bigger than 1 MB). Call `close()` (or use it in a
+    `with` block) to finish the archive.
+    """
+
+    def __init__(self, fileobj, mode="w|gz", prefix=""):
+        super().__init__(prefix)
+        self.tar = tarfile.open(fileobj=fileobj, mode=mode)
+
+    def write_chunks(self, rel_path, chunks):
+        with SpooledTemporaryFile(max_size=SPOOL_SIZE) as spool:
+            for chunk in chunks:
+                spool.write(chunk)
+            size = spool.tell()
+            spool.seek(0)
+            self.write_file(rel_path, spool, size)
+
+    def add_folder(self, name):
+        info = self.make_info(name, tarfile.DIRTYPE, 0o755)
+        self.tar.addfile(info)
+
+    def add_file(self, name, fileobj, size, mode):
+        info = self.make_info(name, tarfile.REGTYPE, mode)
+        info.size = size
+        self.tar.addfile(info, fileobj)
+
+    def make_info(self, name, type_, mode):
+        info = tarfile.TarInfo(name)
+        info.type = type_
+        info.mode = mode
+        info.mtime = self.mtime
+        return info
+
+    def close(self):
+        self.tar.close()
+
+
+class ZipDestination(ArchiveDestination):
+    """Writes the project as a zip archive to `fileobj`, that can be any
+    writable file object (it doesn't need to be seekable).
+
+    The rendered files are written in chunks, as they are rendered.
+    Call `close()` (or use it in a `with` block) to finish the archive.
+    """
+
+    def __init__(self, fileobj, compression=zipfile.ZIP_DEFLATED, prefix=""):
+        super().__init__(prefix)
+        self.zip = zipfile.ZipFile(fileobj, "w", compression=compression)
+
+    def write_chunks(self, rel_path, chunks):
+        name = self.get_name(rel_path)
+        with self.lock:
+            self.names.add(name)
+            with self.zip.open(self.make_info(name, 0o644), "w") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+
+    def add_folder(self, name):
+        info = self.make_info(name + "/", stat.S_IFDIR | 0o755)
+        info.external_attr |= 0x10  # MS-DOS directory flag
+        self.zip.writestr(info, b"")
+
+    def add_file(self, name, fileobj, size, mode):
+        info = self.make_info(name, mode)
+        info.file_size = size
+        with self.zip.open(info, "w") as f:
+            shutil.copyfileobj(fileobj, f)
+
+    def make_info(self, name, mode):
+        info = zipfile.ZipInfo(name, time.localtime(self.mtime)[:6])
+        info.compress_type = self.zip.compression
+        if not stat.S_IFMT(mode):
+            mode |= stat.S_IFREG
+        info.external_attr = mode << 16
+        return info
+
+    def close(self):
+        self.zip.close()
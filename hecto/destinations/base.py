@@ -0,0 +1,115 @@
+from pathlib import PurePosixPath
+
+from ..utils import encode_content
+
+
+__all__ = ("Destination", "make_destination")
+
+
+def make_destination(dst_path):
+    """Returns `dst_path` if it's already a `Destination`, or a
+    `LocalDestination` for that folder."""
+    if isinstance(dst_path, Destination):
+        return dst_path
+    from .local import LocalDestination
+    return LocalDestination(dst_path)
+
+
+class Destination(object):
+    """The base class of the places where a project can be rendered to.
+
+    All the paths are relative to the root of the destination. The
+    destinations that are not folders in the filesystem must implement at
+    least `exists()`, `write_bytes()`, and `has_content()`. Their methods can be
+    called from many threads at the same time.
+    """
+
+    path = PurePosixPath("")
+
+    def exists(self, rel_path):
+        raise NotImplementedError
+
+    def make_folder(self, rel_path):
+        pass
+
+    def write_bytes(self, rel_path, data, mode=0o644):
+        raise NotImplementedError
+
+    def append_bytes(self, rel_path, data):
+        raise NotImplementedError
+
+    def write_chunks(self, rel_path, chunks):
+        """Writes the bytes of every chunk to the file at `rel_path`."""
+        self.write_bytes(rel_path, b"".join(chunks))
+
+    def copy_file(self, source, source_path, rel_path):
+        """Copies a file of the `source` as-is. Returns its size."""
+        data = source.read_bytes(source_path)
+        self.write_bytes(rel_path, data, mode=source.get_mode(source_path))
+        return len(data)
+
+    def has_content(self, rel_path, data, digest=None):
+        """Returns `True` if the file at `rel_path` has exactly the bytes
+        `data`. Its SHA1 `digest`, if known, can be used instead of reading it.
+        """
+        raise NotImplementedError
+
+    def is_identical(self, source, source_path, rel_path):
+        """Returns `True` if the file at `rel_path` has the same content
+        as the file at `source_path` in the `source`."""
+        return self.has_content(rel_path, source.read_bytes(source_path))
+
+    def stream(self, rel_path, chunks, write=True):
+        """Returns the rendered text `chunks` as a content that can be saved
+        to `rel_path` later. See `StreamedFile`."""
+        return StreamedContent(self, rel_path, chunks)
+
+    def save_stream(self, rel_path, content):
+        """Saves to `rel_path` a content returned by `stream()`."""
+        content.save()
+
+    def get_size(self, rel_path):
+        """Returns the size of the file at `rel_path`, if it can be known."""
+        return None
+
+    def get_local_path(self, rel_path):
+        """Returns the path in the filesystem of `rel_path`, if there is one."""
+        return None
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class StreamedContent(object):
+    """Rendered text chunks that are written to a destination only when
+    saved. If the file already exists, the chunks are joined to compare them.
+    """
+
+    digest = None
+    size = 0
+
+    def __init__(self, destination, rel_path, chunks):
+        self.destination = destination
+        self.rel_path = rel_path
+        self.chunks = (encode_content(chunk) for chunk in chunks)
+        self.identical = False
+        if destination.exists(rel_path):
+            self.chunks = [b"".join(self.chunks)]
+            self.identical = destination.has_content(rel_path, self.chunks[0])
+
+    def save(self):
+        self.destination.write_chunks(self.rel_path, self._count(self.chunks))
+
+    def _count(self, chunks):
+        for chunk in chunks:
+            self.size += len(chunk)
+            yield chunk
+
+    def discard(self):
+        self.chunks = None
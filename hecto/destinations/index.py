@@ -0,0 +1,133 @@
+from pathlib import Path, PurePath
+import os
+import threading
+
+
+__all__ = ("DestinationIndex", )
+
+
+class DestinationIndex(object):
+    """What is already in a destination folder, so hecto doesn't have to
+    ask the filesystem again for every file and folder that it writes.
+
+    Each folder is listed with a single `os.scandir()` call, the first time
+    something inside it is needed, and the size and mtime of each file are
+    read only once, when needed. The folders inside others that don't exist
+    are never listed, and if the destination doesn't exist yet, nothing is.
+
+    The index must be told of every change with `add_folder()` and
+    `update()`, so it is only valid for one copy.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.folders = {}
+        self._lock = threading.RLock()
+        if not self.path.is_dir():
+            self.folders[()] = None
+
+    def exists(self, rel_path):
+        parts = self._get_parts(rel_path)
+        if not parts:
+            return self._get_listing(()) is not None
+        entry = self._get_entry(parts)
+        if entry is None:
+            return False
+        if entry.is_symlink():
+            return os.path.exists(entry.path)  # Maybe a broken link
+        return True
+
+    def stat(self, rel_path):
+        """Returns the `os.stat()` of the file at `rel_path`, read only once
+        after each change."""
+        entry = self._get_entry(self._get_parts(rel_path))
+        if entry is None:
+            raise FileNotFoundError(str(self.path / rel_path))
+        return entry.stat()
+
+    def get_size(self, rel_path):
+        """Returns the size of the file at `rel_path` or `None` if it
+        doesn't exist."""
+        try:
+            return self.stat(rel_path).st_size
+        except OSError:
+            return None
+
+    def add_folder(self, rel_path):
+        """Adds a folder just created, and its parents."""
+        parts = self._get_parts(rel_path)
+        with self._lock:
+            if self.folders.get(()) is None and () in self.folders:
+                self.folders[()] = {}
+            for i in range(1, len(parts) + 1):
+                parent = self.folders.get(parts[:i - 1])
+                if parent is not None and parts[i - 1] not in parent:
+                    parent[parts[i - 1]] = Entry(self.path.joinpath(*parts[:i]), True)
+                    self.folders[parts[:i]] = {}  # Just created, so it's empty
+
+    def update(self, rel_path):
+        """Adds a file just written, or forgets what was known of it."""
+        parts = self._get_parts(rel_path)
+        with self._lock:
+            parent = self.folders.get(parts[:-1])
+            if parent is None and parts[:-1] in self.folders:
+                self.add_folder(PurePath(*parts[:-1]))
+                parent = self.folders[parts[:-1]]
+            if parent is not None:
+                parent[parts[-1]] = Entry(self.path.joinpath(*parts), False)
+
+    def _get_parts(self, rel_path):
+        return tuple(part for part in PurePath(rel_path).parts if part != ".")
+
+    def _get_entry(self, parts):
+        if not parts:
+            return None
+        listing = self._get_listing(parts[:-1])
+        if listing is None:
+            return None
+        return listing.get(parts[-1])
+
+    def _get_listing(self, folder):
+        """Returns the entries of the `folder` by name, or `None` if it
+        doesn't exist."""
+        listing = self.folders.get(folder, False)
+        if listing is not False:
+            return listing
+        with self._lock:
+            if folder in self.folders:
+                return self.folders[folder]
+            if folder:
+                entry = self._get_entry(folder)
+                if entry is None or not entry.is_dir():
+                    self.folders[folder] = None
+                    return None
+            listing = self._scan(folder)
+            self.folders[folder] = listing
+        return listing
+
+    def _scan(self, folder):
+        try:
+            with os.scandir(str(self.path.joinpath(*folder))) as entries:
+                return {entry.name: entry for entry in entries}
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+
+
+class Entry(object):
+    """Like the `os.DirEntry` of a file or folder written by hecto."""
+
+    def __init__(self, path, is_dir):
+        self.path = str(path)
+        self._is_dir = is_dir
+        self._stat = None
+
+    def is_dir(self):
+        return self._is_dir
+
+    def is_symlink(self):
+        return False
+
+    def stat(self):
+        if self._stat is None:
+            self._stat = os.stat(self.path)
+        return self._stat
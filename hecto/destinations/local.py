@@ -0,0 +1,74 @@
+from pathlib import Path
+
+from ..utils import file_has_content, StreamedFile
+from .base import Destination
+from .index import DestinationIndex
+
+
+__all__ = ("LocalDestination", )
+
+
+class LocalDestination(Destination):
+    """A folder of the filesystem.
+
+    What is already in the folder is read from a `DestinationIndex`, so a
+    `LocalDestination` must be used for only one copy.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path).resolve()
+        self.index = DestinationIndex(self.path)
+
+    def exists(self, rel_path):
+        return self.index.exists(rel_path)
+
+    def stat(self, rel_path):
+        return self.index.stat(rel_path)
+
+    def get_size(self, rel_path):
+        return self.index.get_size(rel_path)
+
+    def make_folder(self, rel_path):
+        if not self.index.exists(rel_path):
+            # Its parent is almost always made first, so this is one `mkdir`
+            (self.path / rel_path).mkdir(parents=True, exist_ok=True)
+            self.index.add_folder(rel_path)
+
+    def write_bytes(self, rel_path, data, mode=None):
+        (self.path / rel_path).write_bytes(data)
+        self.index.update(rel_path)
+
+    def append_bytes(self, rel_path, data):
+        with (self.path / rel_path).open("ab") as f:
+            f.write(data)
+        self.index.update(rel_path)
+
+    def copy_file(self, source, source_path, rel_path):
+        source.copy_file(source_path, self.path / rel_path)
+        self.index.update(rel_path)
+        return source.get_size(source_path)
+
+    def has_content(self, rel_path, data, digest=None):
+        size = self.index.get_size(rel_path)
+        if size is None:
+            return False
+        return file_has_content(self.path / rel_path, data, digest, size=size)
+
+    def is_identical(self, source, source_path, rel_path):
+        try:
+            stat = self.index.stat(rel_path)
+        except OSError:
+            return False
+        return source.is_identical(source_path, self.path / rel_path, stat)
+
+    def stream(self, rel_path, chunks, write=True):
+        return StreamedFile(
+            chunks, self.path / rel_path, write=write, exists=self.exists(rel_path)
+        )
+
+    def save_stream(self, rel_path, content):
+        content.save()
+        self.index.update(rel_path)
+
+    def get_local_path(self, rel_path):
+        return self.path / rel_path
@@ -0,0 +1,63 @@
+from pathlib import PurePosixPath
+import threading
+
+from .base import Destination
+
+
+__all__ = ("MemoryDestination", )
+
+
+class MemoryDestination(Destination):
+    """Renders the project to memory.
+
+    After the copy, `destination.files` is a dict of the relative paths
+    (with "/" as separator) of the files to their content, as bytes, and
+    `destination.folders` the set of the relative paths of the folders.
+    The `files` argument can be used to start with some existing files.
+    The `name` is the `folder_name` of the project.
+    """
+
+    def __init__(self, files=None, name=""):
+        self.path = PurePosixPath(name)
+        self.files = {}
+        self.modes = {}
+        self.folders = set()
+        self.lock = threading.Lock()
+        for rel_path, content in (files or {}).items():
+            if isinstance(content, str):
+                content = content.encode("utf8")
+            self.write_bytes(PurePosixPath(rel_path), content)
+
+    def get_name(self, rel_path):
+        return PurePosixPath(rel_path).as_posix()
+
+    def exists(self, rel_path):
+        name = self.get_name(rel_path)
+        return name in self.files or name in self.folders
+
+    def make_folder(self, rel_path):
+        name = self.get_name(rel_path)
+        with self.lock:
+            while name not in self.folders and name != ".":
+                self.folders.add(name)
+                name = str(PurePosixPath(name).parent)
+
+    def write_bytes(self, rel_path, data, mode=0o644):
+        name = self.get_name(rel_path)
+        self.make_folder(PurePosixPath(name).parent)
+        with self.lock:
+            self.files[name] = data
+            self.modes[name] = mode
+
+    def append_bytes(self, rel_path, data):
+        name = self.get_name(rel_path)
+        with self.lock:
+            self.files[name] = self.files.get(name, b"") + data
+            self.modes.setdefault(name, 0o644)
+
+    def has_content(self, rel_path, data, digest=None):
+        return self.files.get(self.get_name(rel_path)) == data
+
+    def get_size(self, rel_path):
+        content = self.files.get(self.get_name(rel_path))
+        return None if content is None else len(content)
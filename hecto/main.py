@@ -1,24 +1,47 @@
+from collections import Counter, deque, namedtuple
+from functools import lru_cache
 import datetime
-import filecmp
+import json
 import os
 import re
 import shutil
-from pathlib import Path
+from pathlib import Path, PurePath
 
 import yaml
 
 from . import vcs
-from .utils import copy_file
+from .destinations import make_destination
+from .sources import ArchiveSource, CachedSource, GitSource, is_archive
+from .sources import LocalSource, Source
+from .sources import is_package_url, PackageSource
+from .utils import completed
+from .utils import Deferred
+from .utils import encode_content
 from .utils import JinjaRender
 from .utils import load_config
-from .utils import make_filter
-from .utils import make_folder
-from .utils import make_matcher
+from .utils import make_bytecode_cache
+from .utils import make_executor
+from .utils import make_render_pool
+from .utils import Manifest
+from .utils import MemoryBytecodeCache
+from .utils import PathMatcher
 from .utils import printf, printf_exception, Style
 from .utils import prompt_bool
+from .utils import render_in_worker
+from .utils import Walker
 
 
-__all__ = ("copy", "copy_local")
+__all__ = (
+    "copy",
+    "copy_local",
+    "copy_many",
+    "PlanEntry",
+    "plan_from_json",
+    "plan_to_json",
+    "Renderer",
+    "Step",
+    "Summary",
+)
 
 
 def copy(
@@ -37,17 +60,33 @@ def copy(
     force=False,
     skip=False,
     quiet=False,
+    incremental=False,
+    stream=False,
+    trusted=False,
+    workers=None,
+    processes=None,
+    bytecode_cache=None,
+    vcs_ref=None,
+    subdirectory=None,
+    vcs_cache=None,
+    copy_strategy=None,
 ):
     """
     Uses the template in src_path to generate a new project at dst_path.
 
     Arguments:
 
-    - src_path (str):
+    - src_path (str or Source):
         Absolute path to the project skeleton. May be a version control system URL
+        or a zip or tar archive (read without extracting it), or a folder inside
+        an installed package, like "pkg://mypackage/templates/app". It can also
+        be a `hecto.sources.Source`, like a `MemorySource`.
 
-    - dst_path (str):
-        Absolute path to where to render the skeleton
+    - dst_path (str or Destination):
+        Absolute path to where to render the skeleton. It can also be a
+        `hecto.destinations.TarDestination` or `ZipDestination`, to write
+        the project as an archive to any writable file object, or a
+        `MemoryDestination` to render it to a dict.
 
     - data (dict):
         Optional. Data to be passed to the templates in addtion to the user data from
@@ -101,37 +140,158 @@ def copy(
     - quiet (bool):
         Suppress the status output
 
+    - incremental (bool):
+        Write a `.hecto-manifest.json` file to the destination with the
+        inputs of every output file. In the next runs, the files whose
+        source, included templates, and data haven't changed, and that weren't
+        modified in the destination since, are skipped without rendering or
+        reading them. Only the values of the variables used by each file (in
+        its templates or in its path) are compared, so changing one value of
+        `data` renders again only the files that use it.
+
+    - stream (bool):
+        Render the templates in chunks, written to a temporary file that
+        replaces the destination file only if it has changed, so the rendered
+        files are never entirely in memory. Useful for very large outputs.
+        The files to append to others are not streamed.
+
+    - trusted (bool):
+        Render the templates without a sandbox, that is faster, specially for
+        templates that access many attributes or call many functions. Use it
+        only with templates you trust. Use `None` to let a project template
+        in a local folder decide it with its `hecto.yaml` file. The config
+        file of any other template (eg: a git URL or an archive) is ignored.
+
+    - workers (int):
+        Number of threads used to render and copy the files. The folders are
+        still created in order and the status output is the same as with only
+        one. Conflicts that need asking the user are resolved by the main thread.
+        Note that the `render_as` and `get_context` hooks might be called from
+        any of these threads.
+
+    - processes (int):
+        Number of processes used to render the templates, for when the
+        rendering is CPU-bound. Each process has its own Jinja environment, so
+        `data` must be picklable and the `jinja_filters` must be functions
+        defined at the top level of a module (or "module:name" import paths).
+        The rendered content is sent back to be saved by the main thread.
+        Needs Python 3.7+.
+
+    - bytecode_cache (str or BytecodeCache):
+        Optional folder where to store the compiled templates, so they
+        don't have to be compiled again in the next runs. Use a
+        `hecto.utils.BytecodeCache(folder, max_size=...)` to change its
+        maximum size (100 MB by default).
+
+    - vcs_ref (str):
+        Optional branch, tag, or commit to use, if `src_path` is a version
+        control system URL. Only the files of that version are downloaded,
+        without the history. By default, the current HEAD of the repository.
+
+    - subdirectory (str):
+        Optional subfolder of `src_path` where the project template is. If
+        `src_path` is a version control system URL, only the files of that
+        folder are downloaded (if the server supports partial clones). With a
+        `vcs_cache`, the whole repository is mirrored instead.
+
+    - vcs_cache (str or MirrorCache):
+        Optional folder where to keep a mirror of the repositories used as
+        `src_path`, so they don't have to be cloned again. Use a
+        `hecto.vcs.MirrorCache(folder, ttl=..., max_size=..., offline=...)`
+        instead to change how often the mirrors are updated (every hour by
+        default), the maximum size of the cache (1 GB by default), or to
+        never use the network.
+
+    - copy_strategy (str or function):
+        How to copy the files of a local project template that aren't
+        templates. "copy" (the default) copies the content and the metadata,
+        "fast" copies only the content and permissions (using
+        `copy_file_range` or `sendfile` when available), "reflink" makes a
+        copy-on-write clone on filesystems that support it, and "hardlink"
+        makes hard links (so use it only if the destination files are never
+        modified). The last two fall back to "fast" if they can't be done.
+        It can also be a function taking the source and destination paths.
+
+    Returns a `Summary` of the files of the project, by action, and the
+    number of bytes written.
     """
-    repo = vcs.get_repo(src_path)
-    if repo:
-        src_path = vcs.clone(repo)
-
-    try:
-        copy_local(
-            src_path,
+    with Renderer(
+        src_path,
+        exclude=exclude,
+        include=include,
+        skip_if_exists=skip_if_exists,
+        envops=envops,
+        jinja_filters=jinja_filters,
+        render_as=render_as,
+        get_context=get_context,
+        trusted=trusted,
+        workers=workers,
+        processes=processes,
+        bytecode_cache=bytecode_cache,
+        vcs_ref=vcs_ref,
+        subdirectory=subdirectory,
+        vcs_cache=vcs_cache,
+        copy_strategy=copy_strategy,
+    ) as renderer:
+        return renderer.copy(
             dst_path,
-            data=data,
-            exclude=exclude,
-            include=include,
-            skip_if_exists=skip_if_exists,
-            envops=envops,
-            jinja_filters=jinja_filters,
-            render_as=render_as,
-            get_context=get_context,
+            data,
             pretend=pretend,
             force=force,
             skip=skip,
             quiet=quiet,
+            incremental=incremental,
+            stream=stream,
         )
-    finally:
-        if repo:
-            shutil.rmtree(src_path)
+
+
+COPY_FLAGS = ("pretend", "force", "skip", "quiet", "incremental", "stream")
+
+
+def copy_many(src_path, jobs, *, workers=None, quiet=True, **kwargs):
+    """Uses the template in `src_path` to generate many projects, one for each
+    `(dst_path, data)` in `jobs`.
+
+    The project template is read, walked, and compiled only once, for all
+    of them, and up to `workers` projects are generated at the same time, by
+    different threads. Use `copy_strategy="hardlink"` or `"reflink"` to share
+    the files that aren't templates between all the projects.
+
+    The other arguments are the same as `copy()`, except that the status
+    output is disabled by default and `workers` is the number of projects
+    generated at the same time. There is no one to ask about the conflicts,
+    so, unless `force` is true, the files that already exist are skipped;
+    `skip=False` without `force` is an error.
+
+    Returns a list with a `Summary` of each project, in the same order. If a
+    project couldn't be generated, the exception is its `error`.
+    """
+    flags = {key: kwargs.pop(key) for key in COPY_FLAGS if key in kwargs}
+    flags["quiet"] = quiet
+    flags.setdefault("skip", not flags.get("force"))
+    if not (flags["skip"] or flags.get("force")):
+        raise ValueError("copy_many() can't ask about conflicts, use skip or force")
+
+    with Renderer(src_path, **kwargs) as renderer:
+        renderer.source = CachedSource(renderer.source)
+
+        def copy_one(job):
+            dst_path, data = job
+            try:
+                return renderer.copy(dst_path, data, **flags)
+            except Exception as e:
+                return Summary(dst_path, Counter(), 0, e)
+
+        with make_executor(workers) as executor:
+            futures = [executor.submit(copy_one, job) for job in jobs]
+            return [future.result() for future in futures]
 
 
 GLOBAL_DEFAULTS = {
     "exclude": ["~*", "~*/*", ".*", ".*/*", "__pycache__", "__pycache__/*"],
     "include": [".gitignore", ".gittouch", ".touch"],
     "skip_if_exists": [],
+    "trusted": False,
 }
 
 DEFAULT_DATA = {"now": datetime.datetime.utcnow}
@@ -143,17 +303,6 @@ def default_render_as(src_path, dst_path):
         return Path(re.sub(RE_TMPL, "", str(dst_path)))
 
 
-def resolve_source_path(src_path):
-    src_path = Path(src_path).resolve()
-    if not src_path.exists():
-        raise ValueError("Project template not found")
-
-    if not src_path.is_dir():
-        raise ValueError("The project template must be a folder")
-
-    return src_path
-
-
 def copy_local(
     src_path,
     dst_path,
@@ -166,186 +315,768 @@ def copy_local(
     jinja_filters=None,
     render_as=None,
     get_context=None,
+    trusted=False,
+    workers=None,
+    processes=None,
+    bytecode_cache=None,
+    vcs_ref=None,
+    subdirectory=None,
+    vcs_cache=None,
+    copy_strategy=None,
     **flags,
 ):
-    src_path = resolve_source_path(src_path)
-    dst_path = Path(dst_path).resolve()
-    render_as = render_as or default_render_as
-    get_context = get_context
-
-    user_settings = {
-        "exclude": exclude,
-        "include": include,
-        "skip_if_exists": skip_if_exists,
-    }
-    config = get_config(user_settings, src_path, flags)
-    config["exclude"].extend(["hecto.yaml", "hecto.yml"])
-
-    envops = envops or {}
-    envops.setdefault("block_start_string", "[%")
-    envops.setdefault("block_end_string", "%]")
-    envops.setdefault("variable_start_string", "[[")
-    envops.setdefault("variable_end_string", "]]")
-
-    _data = DEFAULT_DATA.copy()
-    _data.update(data or {})
-    _data.setdefault("folder_name", dst_path.name)
-    render = JinjaRender(src_path, _data, filters=jinja_filters, envops=envops)
-
-    exclude_patterns = [render.string(pattern) for pattern in config["exclude"]]
-    include_patterns = [render.string(pattern) for pattern in config["include"]]
-    skip_if_exists_patterns = [
-        render.string(pattern) for pattern in config["skip_if_exists"]
-    ]
-
-    must_exclude = make_matcher(exclude_patterns)
-    must_include = make_matcher(include_patterns)
-    must_filter = make_filter(must_exclude, must_include)
-    must_skip_if_exists = make_matcher(skip_if_exists_patterns)
-
-    if not flags["quiet"]:
-        print("")  # padding space
-
-    for folder, _, files in os.walk(str(src_path)):
-        rel_folder = folder.replace(str(src_path), "", 1).lstrip(os.path.sep)
-        rel_folder = render.string(rel_folder)
-        rel_folder = rel_folder.replace("." + os.path.sep, ".", 1)
-
-        if must_filter(rel_folder):
-            continue
+    with Renderer(
+        src_path,
+        exclude=exclude,
+        include=include,
+        skip_if_exists=skip_if_exists,
+        envops=envops,
+        jinja_filters=jinja_filters,
+        render_as=render_as,
+        get_context=get_context,
+        trusted=trusted,
+        workers=workers,
+        processes=processes,
+        bytecode_cache=bytecode_cache,
+        vcs_ref=vcs_ref,
+        subdirectory=subdirectory,
+        vcs_cache=vcs_cache,
+        copy_strategy=copy_strategy,
+    ) as renderer:
+        return renderer.copy(dst_path, data, **flags)
+
+
+class Renderer(object):
+    """A project template ready to be copied many times, for example, by a
+    long-running service.
+
+    The source path, the config file, and the patterns are read only once, and
+    the compiled templates are shared between copies. So the work done by each
+    `renderer.copy(dst_path, data)` is only the one that depends on the data.
+    `copy()` can be called from many threads at the same time.
+
+    The arguments are the same as `hecto.copy()`. If the source is a version
+    control system URL, it is fetched only once, and the files are read
+    directly from the git objects, without a checkout. The fetched repository
+    is deleted by `renderer.close()` (or at the end of a `with` block).
+    """
 
-        folder = Path(folder)
-        rel_folder = Path(rel_folder)
+    def __init__(
+        self,
+        src_path,
+        *,
+        exclude=None,
+        include=None,
+        skip_if_exists=None,
+        envops=None,
+        jinja_filters=None,
+        render_as=None,
+        get_context=None,
+        trusted=False,
+        workers=None,
+        processes=None,
+        bytecode_cache=None,
+        vcs_ref=None,
+        subdirectory=None,
+        vcs_cache=None,
+        copy_strategy=None,
+    ):
+        self.repo = vcs.get_repo(src_path)
+        self.clone_path = None
+        self.source = None
+        try:
+            self.source = self.get_source(
+                src_path, vcs_ref, subdirectory, vcs_cache, copy_strategy
+            )
+        except Exception:
+            self.close()
+            raise
+        self.src_path = self.source.path
+
+        self.render_as = render_as or default_render_as
+        self.get_context = get_context
+        self.jinja_filters = jinja_filters
+        self.workers = workers
+        self.processes = processes
+
+        user_settings = {
+            "exclude": exclude,
+            "include": include,
+            "skip_if_exists": skip_if_exists,
+        }
+        self.config, self.config_error = get_config(user_settings, self.source)
+        self.config["exclude"] = self.config["exclude"] + ["hecto.yaml", "hecto.yml"]
+        self.trusted = bool(trusted)
+        if trusted is None and isinstance(self.source, LocalSource):
+            # The caller lets a local project template decide
+            self.trusted = bool(self.config["trusted"])
+
+        envops = (envops or {}).copy()
+        envops.setdefault("block_start_string", "[%")
+        envops.setdefault("block_end_string", "%]")
+        envops.setdefault("variable_start_string", "[[")
+        envops.setdefault("variable_end_string", "]]")
+        envops["bytecode_cache"] = MemoryBytecodeCache(
+            make_bytecode_cache(bytecode_cache or envops.get("bytecode_cache"))
+        )
+        envops.setdefault("loader", self.source.get_loader())
+        self.envops = envops
+        # The compiled names of the files and folders, shared by all the copies
+        self.name_cache = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def get_source(
+        self, src_path, vcs_ref, subdirectory, vcs_cache, copy_strategy=None
+    ):
+        if isinstance(src_path, Source):
+            return src_path
+        if is_package_url(src_path):
+            return PackageSource(src_path, subdirectory=subdirectory)
+        if not self.repo and is_archive(src_path):
+            return ArchiveSource(src_path, subdirectory=subdirectory)
+        if not self.repo:
+            if subdirectory:
+                src_path = Path(src_path) / subdirectory
+            return LocalSource(src_path, copy_strategy=copy_strategy)
+
+        mirrors = vcs.make_mirror_cache(vcs_cache)
+        if mirrors:
+            repo_path, vcs_ref = mirrors.resolve(self.repo, vcs_ref)
+        else:
+            repo_path = vcs.fetch(self.repo, vcs_ref, subdirectory)
+            self.clone_path = repo_path
+            vcs_ref = "FETCH_HEAD"
+        return GitSource(repo_path, vcs_ref, subdirectory=subdirectory)
+
+    def close(self):
+        """Deletes the source repository if it was fetched just for this."""
+        if self.source:
+            self.source.close()
+        if self.clone_path:
+            shutil.rmtree(self.clone_path, ignore_errors=True)
+            self.clone_path = None
+
+    def render_patterns(self, render, key):
+        return tuple(render.render_name(pattern) for pattern in self.config[key])
+
+    def make_render(self, data=None, folder_name=""):
+        """Returns the `JinjaRender` of the templates with this `data`."""
+        _data = DEFAULT_DATA.copy()
+        _data.update(data or {})
+        _data.setdefault("folder_name", folder_name)
+        return JinjaRender(
+            self.src_path,
+            _data,
+            filters=self.jinja_filters,
+            envops=self.envops,
+            name_cache=self.name_cache,
+            trusted=self.trusted,
+        )
 
-        render_folder(dst_path, rel_folder, flags)
+    def make_matcher(self, render):
+        return get_matcher(
+            self.render_patterns(render, "exclude"),
+            self.render_patterns(render, "include"),
+            self.render_patterns(render, "skip_if_exists"),
+        )
 
-        source_paths = get_source_paths(folder, rel_folder, files, render, must_filter)
+    def make_manifest(self, destination, render):
+        local_path = destination.get_local_path(Path("."))
+        if not local_path:
+            raise ValueError("The incremental mode only works with folders")
+        stat = getattr(destination, "stat", None)
+        return Manifest(local_path, self.source, render, render.data, stat=stat)
+
+    def make_render_pool(self, render):
+        if self.processes:
+            return make_render_pool(
+                self.processes,
+                self.src_path,
+                render.data,
+                filters=self.jinja_filters,
+                envops=self.envops,
+                trusted=self.trusted,
+            )
 
-        for source_path, rel_path in source_paths:
-            render_file(
-                dst_path,
-                rel_path,
-                source_path,
-                render,
-                render_as,
-                get_context,
+    def iter_steps(self, data=None, folder_name="", render=None):
+        """Yields the `Step`s to render the project, in order.
+
+        The steps are made lazily, while walking the project template, by a
+        pipeline of generators: `walk_skeleton()` → `filter_steps()` →
+        `plan_steps()`. So the memory used doesn't grow with the size of the
+        project, and the steps can be inspected or consumed one by one.
+        """
+        render = render or self.make_render(data, folder_name)
+        matcher = self.make_matcher(render)
+        walker = Walker(self.source, render, matcher.must_filter, matcher.must_prune)
+        steps = walk_skeleton(walker, render)
+        steps = filter_steps(steps, matcher.must_filter)
+        return plan_steps(steps, self.render_as)
+
+    def execute(self, steps, destination, render, flags, manifest=None):
+        """Runs the `steps` (from `iter_steps()`) with the workers and
+        processes of the renderer, and yields the `Result` of each one, in
+        order, with the conflicts already resolved. The steps are consumed
+        only a few at a time ahead of the results.
+        """
+        must_skip_if_exists = self.make_matcher(render).must_skip_if_exists
+        pending = deque()
+        render_pool = self.make_render_pool(render)
+        try:
+            with make_executor(self.workers) as executor:
+                for step in steps:
+                    pending.append(self.submit_step(
+                        step,
+                        destination,
+                        render,
+                        must_skip_if_exists,
+                        flags,
+                        manifest,
+                        executor,
+                        render_pool,
+                    ))
+                    yield from get_results(pending, flags)
+                yield from get_results(pending, flags, wait=True)
+        finally:
+            if render_pool:
+                render_pool.shutdown()
+
+    def submit_step(
+        self,
+        step,
+        destination,
+        render,
+        must_skip_if_exists,
+        flags,
+        manifest,
+        executor,
+        render_pool=None,
+    ):
+        if step.action == "folder":
+            # Folders are always created in order, by this thread
+            return completed(render_folder(destination, step.rel_path, flags))
+        if render_pool:
+            return render_file_in_pool(
+                render_pool,
+                executor,
+                self.source,
+                destination,
+                step,
+                self.get_context,
                 must_skip_if_exists,
                 flags,
+                manifest,
             )
+        return executor.submit(
+            render_file,
+            self.source,
+            destination,
+            step,
+            render,
+            self.get_context,
+            must_skip_if_exists,
+            flags,
+            manifest,
+        )
 
+    def plan(self, dst_path, data=None, *, skip=False, exact=False):
+        """Returns what `copy()` would do, as a list of `PlanEntry`, without
+        rendering any template nor writing anything. See `plan_to_json()` to
+        serialize it.
+
+        The action of each folder and file is "create", "update", "skip",
+        or "append". The files that already exist are planned to be updated,
+        unless they must be skipped (or `skip` is `True`), because knowing if
+        they are identical needs rendering them. With `exact=True`, those files
+        are rendered (or compared) to find out, and the ones that don't change
+        are planned as "identical".
+        """
+        destination = make_destination(dst_path)
+        render = self.make_render(data, destination.path.name)
+        must_skip_if_exists = self.make_matcher(render).must_skip_if_exists
+        plan = []
+        for step in self.iter_steps(render=render):
+            action = get_planned_action(step, destination, must_skip_if_exists, skip)
+            if exact and action == "update":
+                action = self.check_step(step, destination, render)
+            plan.append(PlanEntry(
+                action,
+                step.source_path.relative_to(self.src_path).as_posix(),
+                PurePath(step.rel_path).as_posix(),
+                step.action == "render",
+            ))
+        return plan
+
+    def check_step(self, step, destination, render):
+        """Returns "identical" if the file of the `step` would not change
+        with this render, or "update" otherwise."""
+        content = None
+        if step.action == "render":
+            context = self.get_context(step.walked_path) if self.get_context else {}
+            content = render(step.source_path, **context)
+        if file_is_identical(
+            self.source, step.source_path, destination, step.rel_path, content
+        ):
+            return "identical"
+        return "update"
+
+    def copy(self, dst_path, data=None, **flags):
+        """Uses the template to generate a new project at dst_path.
+        See `hecto.copy()` for the meaning of the arguments.
+        """
+        flags.setdefault("pretend", False)
+        flags.setdefault("force", False)
+        flags.setdefault("skip", False)
+        flags.setdefault("quiet", False)
+        flags.setdefault("incremental", False)
+        flags.setdefault("stream", False)
+
+        destination = make_destination(dst_path)
+        if self.config_error:
+            printf_exception(
+                "INVALID CONFIG FILE", msg="hecto.yaml", quiet=flags["quiet"]
+            )
 
-def get_config(user_settings, src_path, flags):
+        render = self.make_render(data, destination.path.name)
+        manifest = None
+        if flags["incremental"]:
+            manifest = self.make_manifest(destination, render)
+
+        if not flags["quiet"]:
+            print("")  # padding space
+
+        actions = Counter()
+        size = 0
+        steps = self.iter_steps(render=render)
+        for result in self.execute(steps, destination, render, flags, manifest):
+            report(result, flags, manifest)
+            if not result.display_path.endswith(os.path.sep):
+                actions[result.action] += 1
+                size += result.size
+        if manifest and not flags["pretend"]:
+            manifest.save()
+        return Summary(dst_path, actions, size)
+
+
+def get_config(user_settings, source):
+    """Returns the settings and `True` if the config file could not be read."""
     try:
-        return load_config(
-            GLOBAL_DEFAULTS,
-            user_settings,
-            [src_path / "hecto.yaml", src_path / "hecto.yml"],
+        user_defaults = {}
+        for name in ("hecto.yaml", "hecto.yml"):
+            path = source.path / name
+            if source.exists(path):
+                user_defaults = yaml.safe_load(source.read_text(path)) or {}
+                break
+        config = load_config(
+            GLOBAL_DEFAULTS, user_settings, user_defaults=user_defaults
         )
+        return config, False
     except yaml.YAMLError:
-        printf_exception(
-            "INVALID CONFIG FILE", msg="hecto.yaml", quiet=flags.get("quiet")
-        )
-        return GLOBAL_DEFAULTS
+        return GLOBAL_DEFAULTS.copy(), True
+
+
+@lru_cache(maxsize=32)
+def get_matcher(exclude, include, skip_if_exists):
+    return PathMatcher(exclude=exclude, include=include, skip_if_exists=skip_if_exists)
+
+
+# The `action` is "folder", "render" (a template), or "copy" (as-is).
+# The `walked_path` is the relative path of a file before `render_as`.
+Step = namedtuple("Step", "action source_path rel_path walked_path")
+Step.__new__.__defaults__ = (None, )
 
 
-def get_source_paths(folder, rel_folder, files, render, must_filter):
-    source_paths = []
-    for src_name in files:
-        dst_name = render.string(src_name)
-        rel_path = rel_folder / dst_name
+def walk_skeleton(walker, render):
+    """Yields a "folder" step for each folder of the project template that
+    must be rendered, followed by a "file" step for each one of its files,
+    with their names rendered."""
+    for folder, rel_folder, files in walker:
+        yield Step("folder", folder, rel_folder)
+        for src_name in files:
+            rel_path = rel_folder / render.render_name(src_name)
+            yield Step("file", folder / src_name, rel_path)
 
-        if must_filter(rel_path):
+
+def filter_steps(steps, must_filter):
+    """Drops the files that must not be rendered. The folders were already
+    filtered by the walker."""
+    for step in steps:
+        if step.action != "file" or not must_filter(step.rel_path):
+            yield step
+
+
+def plan_steps(steps, render_as):
+    """Decides if each file is a template (and where to render it) or
+    must be copied as-is."""
+    for step in steps:
+        if step.action != "file":
+            yield step
             continue
-        source_paths.append((folder / src_name, rel_path))
-    return source_paths
+        render_to = render_as(step.source_path, step.rel_path)
+        if render_to:
+            yield Step("render", step.source_path, render_to, step.rel_path)
+        else:
+            yield Step("copy", step.source_path, step.rel_path, step.rel_path)
+
+
+# The `source_path` and `rel_path` are relative and use "/" as separator
+PlanEntry = namedtuple("PlanEntry", "action source_path rel_path templated")
+
 
+def get_planned_action(step, destination, must_skip_if_exists, skip=False):
+    if not destination.exists(step.rel_path):
+        return "create"
+    if step.action == "folder":
+        return "skip"
+    if step.action == "render" and str(step.source_path).endswith(".append"):
+        return "append"
+    if skip or must_skip_if_exists(step.rel_path):
+        return "skip"
+    return "update"
 
-def render_folder(dst_path, rel_folder, flags):
-    final_path = dst_path / rel_folder
+
+def plan_to_json(plan):
+    """Returns the list of `PlanEntry` returned by `Renderer.plan()` as JSON."""
+    return json.dumps([entry._asdict() for entry in plan])
+
+
+def plan_from_json(data):
+    """Returns the list of `PlanEntry` serialized by `plan_to_json()`."""
+    return [PlanEntry(**entry) for entry in json.loads(data)]
+
+
+Result = namedtuple(
+    "Result",
+    "action display_path source source_path destination rel_path content append "
+    "record size",
+)
+Result.__new__.__defaults__ = (None, None, None, None, None, False, None, 0)
+
+STYLES = {
+    "created": Style.OK,
+    "extended": Style.OK,
+    "identical": Style.IGNORE,
+    "skipped": Style.WARNING,
+    "updated": Style.WARNING,
+}
+
+
+RECORDED = ("created", "identical", "updated")
+
+# The `actions` counts the files by action ("created", "identical", etc.),
+# and `size` is the total number of bytes written (or appended).
+Summary = namedtuple("Summary", "dst_path actions size error")
+Summary.__new__.__defaults__ = (None, )
+
+# How many steps can be running before waiting for the first one
+MAX_PENDING = 1000
+
+
+def get_results(pending, flags, wait=False):
+    """Yields the results of the rendered folders and files, in order,
+    resolving the conflicts found. Stops at the first result that is not
+    ready, unless `wait` is `True` or there are too many pending.
+    """
+    while pending:
+        future = pending[0]
+        if not (wait or future.done() or len(pending) > MAX_PENDING):
+            return
+        pending.popleft()
+        result = future.result()
+        if result is None:
+            continue
+        if result.action == "conflict":
+            result = resolve_conflict(result, flags)
+        yield result
+
+
+def report(result, flags, manifest=None):
+    """Print the result of a rendered folder or file.
+    The files saved are added to the `manifest`, if any.
+    """
+    if manifest and result.record and result.action in RECORDED:
+        if not flags["pretend"]:
+            manifest.add(result.display_path, result.record)
+    printf(
+        result.action,
+        result.display_path,
+        style=STYLES[result.action],
+        quiet=flags["quiet"],
+    )
+
+
+def render_folder(destination, rel_folder, flags):
     display_path = str(rel_folder) + os.path.sep
 
     if str(rel_folder) == ".":
-        make_folder(final_path, pretend=flags["pretend"])
+        if not flags["pretend"]:
+            destination.make_folder(rel_folder)
         return
 
-    if final_path.exists():
-        printf("identical", display_path, style=Style.IGNORE, quiet=flags["quiet"])
-        return
+    if destination.exists(rel_folder):
+        return Result("identical", display_path)
 
-    make_folder(final_path, pretend=flags["pretend"])
-    printf("created", display_path, style=Style.OK, quiet=flags["quiet"])
+    if not flags["pretend"]:
+        destination.make_folder(rel_folder)
+    return Result("created", display_path)
 
 
 def render_file(
-    dst_path,
-    rel_path,
-    source_path,
+    source,
+    destination,
+    step,
     render,
-    render_as,
     get_context,
     must_skip_if_exists,
     flags,
+    manifest=None,
 ):
-    """Process or copy a file of the skeleton.
+    """Process or copy a file of the skeleton, following the `step`.
+    Returns the result of `save_file()`.
+
+    If there is a `manifest` and it says the file hasn't changed since the
+    last run, it is skipped without rendering it.
     """
-    render_to = render_as(source_path, rel_path)
-    if render_to:
-        context = get_context(rel_path) if get_context else {}
+    source_path, rel_path = step.source_path, step.rel_path
+    templated = step.action == "render"
+    context = None
+    if templated:
+        context = get_context(step.walked_path) if get_context else {}
+
+    manifest = get_manifest(manifest, source_path)
+    if manifest:
+        record = manifest.get_fresh(rel_path, source_path, context)
+        if record:
+            return Result("identical", str(rel_path), record=record)
+
+    if not templated:
+        content = None
+    elif must_stream(source_path, flags):
+        content = destination.stream(
+            rel_path,
+            render.stream(source_path, **context),
+            write=not flags["pretend"],
+        )
+    else:
         content = render(source_path, **context)
-        rel_path = render_to
-        append = str(source_path).endswith(".append")
+
+    return save_file(
+        source,
+        destination,
+        rel_path,
+        source_path,
+        content,
+        must_skip_if_exists,
+        flags,
+        make_record(manifest, source_path, context, content),
+        get_digest(manifest, rel_path, content),
+    )
+
+
+def render_file_in_pool(
+    render_pool,
+    executor,
+    source,
+    destination,
+    step,
+    get_context,
+    must_skip_if_exists,
+    flags,
+    manifest=None,
+):
+    """Like `render_file()` but the template is rendered by a process in the
+    `render_pool` and the result is saved later, by the thread that request it.
+    The files that are not templates are copied using the `executor`.
+    """
+    source_path, rel_path = step.source_path, step.rel_path
+    render_to = rel_path if step.action == "render" else None
+    context = None
+    if render_to:
+        context = get_context(step.walked_path) if get_context else {}
+
+    manifest = get_manifest(manifest, source_path)
+    if manifest:
+        record = manifest.get_fresh(rel_path, source_path, context)
+        if record:
+            return completed(Result("identical", str(rel_path), record=record))
+
+    if not render_to:
+        return executor.submit(
+            save_file,
+            source,
+            destination,
+            rel_path,
+            source_path,
+            None,
+            must_skip_if_exists,
+            flags,
+            make_record(manifest, source_path, None, None),
+        )
+
+    # The workers can only stream to files in the filesystem
+    local_path = destination.get_local_path(render_to)
+    if local_path and must_stream(source_path, flags):
+        future = render_pool.submit(
+            render_in_worker,
+            str(source_path),
+            context,
+            str(local_path),
+            not flags["pretend"],
+            destination.exists(render_to),
+        )
     else:
-        content = None
-        append = False
+        future = render_pool.submit(render_in_worker, str(source_path), context)
+    return Deferred(future, lambda content: save_file(
+        source,
+        destination,
+        render_to,
+        source_path,
+        content,
+        must_skip_if_exists,
+        flags,
+        make_record(manifest, source_path, context, content),
+        get_digest(manifest, render_to, content),
+    ))
+
+
+def must_stream(source_path, flags):
+    return flags["stream"] and not str(source_path).endswith(".append")
+
 
+def get_manifest(manifest, source_path):
+    """The files that are appended to others are never skipped."""
+    if manifest and not str(source_path).endswith(".append"):
+        return manifest
+
+
+def make_record(manifest, source_path, context, content):
+    if manifest:
+        return manifest.make_record(source_path, context, content)
+
+
+def get_digest(manifest, rel_path, content):
+    if manifest and content is not None:
+        return manifest.get_digest(rel_path)
+
+
+def save_file(
+    source,
+    destination,
+    rel_path,
+    source_path,
+    content,
+    must_skip_if_exists,
+    flags,
+    record=None,
+    digest=None,
+):
+    """Save the rendered `content` or, if is `None`, copy the source file.
+
+    Returns the result of the action done. If the file already exists and the
+    user must be asked to overwrite it, nothing is written and a "conflict"
+    result is returned instead, to be resolved with `resolve_conflict()`.
+    The `record` for the manifest, if any, is passed along in the result.
+    The `digest` of the existing file, if known, saves reading it.
+    """
+    append = content is not None and str(source_path).endswith(".append")
     display_path = str(rel_path)
-    final_path = dst_path / rel_path
-    exists = final_path.exists()
+    exists = destination.exists(rel_path)
 
     if exists and append:
-        printf("extended", display_path, style=Style.OK, quiet=flags["quiet"])
+        action = "extended"
     elif exists:
-        if file_is_identical(source_path, final_path, content):
-            printf("identical", display_path, style=Style.IGNORE, quiet=flags["quiet"])
-            return
+        if file_is_identical(
+            source, source_path, destination, rel_path, content, digest
+        ):
+            discard(content)
+            return Result("identical", display_path, record=record)
 
         if must_skip_if_exists(rel_path):
-            printf("skipped", display_path, style=Style.WARNING, quiet=flags["quiet"])
-            return
-
-        if overwrite_file(display_path, source_path, final_path, content, flags):
-            printf("updated", display_path, style=Style.WARNING, quiet=flags["quiet"])
-        else:
-            printf("skipped", display_path, style=Style.WARNING, quiet=flags["quiet"])
-            return
+            discard(content)
+            return Result("skipped", display_path)
+
+        if not flags["force"]:
+            if flags["skip"]:
+                discard(content)
+                return Result("skipped", display_path)
+            return Result(
+                "conflict",
+                display_path,
+                source,
+                source_path,
+                destination,
+                rel_path,
+                content,
+                append,
+                record,
+            )
+        action = "updated"
     else:
-        printf("created", display_path, style=Style.OK, quiet=flags["quiet"])
+        action = "created"
 
-    if flags["pretend"]:
-        return
+    size = 0
+    if not flags["pretend"]:
+        size = write_file(source, source_path, destination, rel_path, content, append)
+    discard(content)
+    return Result(action, display_path, record=record, size=size)
+
+
+def resolve_conflict(result, flags):
+    display_path, source, source_path, destination, rel_path = result[1:6]
+    content, append = result.content, result.append
+    final_path = destination.path / rel_path
+    if not overwrite_file(display_path, source_path, final_path, content, flags):
+        discard(content)
+        return Result("skipped", display_path)
 
+    size = 0
+    if not flags["pretend"]:
+        size = write_file(source, source_path, destination, rel_path, content, append)
+    discard(content)
+    return Result("updated", display_path, record=result.record, size=size)
+
+
+def write_file(source, source_path, destination, rel_path, content, append):
+    """Returns the number of bytes written (or appended)."""
     if content is None:
-        copy_file(source_path, final_path)
-    elif append:
-        with final_path.open("a") as f:
-            f.write(content)
+        return destination.copy_file(source, source_path, rel_path) or 0
+    if is_streamed(content):
+        destination.save_stream(rel_path, content)
+        return content.size
+    data = encode_content(content)
+    if append:
+        destination.append_bytes(rel_path, data)
     else:
-        final_path.write_text(content)
+        destination.write_bytes(rel_path, data)
+    return len(data)
 
 
-def file_is_identical(source_path, final_path, content):
+def file_is_identical(
+    source, source_path, destination, rel_path, content, digest=None
+):
+    """Checks the sizes first, so most of the changed files are found
+    without reading them."""
     if content is None:
-        return files_are_identical(source_path, final_path)
+        return destination.is_identical(source, source_path, rel_path)
+    if is_streamed(content):
+        return content.identical
 
-    return file_has_this_content(final_path, content)
+    return destination.has_content(rel_path, encode_content(content), digest)
 
 
-def files_are_identical(path1, path2):
-    return filecmp.cmp(str(path1), str(path2), shallow=False)
+def is_streamed(content):
+    return content is not None and not isinstance(content, str)
 
 
-def file_has_this_content(path, content):
-    return content == path.read_text()
+def discard(content):
+    """Deletes the temporary file of a streamed content that wasn't saved."""
+    if is_streamed(content):
+        content.discard()
 
 
 def overwrite_file(display_path, source_path, final_path, content, flags):
@@ -0,0 +1,7 @@
+from .archive import *  # noqa
+from .base import *  # noqa
+from .cached import *  # noqa
+from .git import *  # noqa
+from .local import *  # noqa
+from .memory import *  # noqa
+from .package import *  # noqa
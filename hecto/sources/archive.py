@@ -0,0 +1,208 @@
+from pathlib import Path
+import mmap
+import os
+import posixpath
+import shutil
+import tarfile
+import zipfile
+
+from ..utils import file_has_content
+from .base import ListedSource
+
+
+__all__ = ("ArchiveSource", "is_archive")
+
+
+def is_archive(path):
+    """Returns `True` if `path` is a zip or tar (maybe compressed) file."""
+    path = Path(path)
+    if not path.is_file():
+        return False
+    return zipfile.is_zipfile(str(path)) or tarfile.is_tarfile(str(path))
+
+
+def _get_relpath(name, prefix):
+    """Returns the path of the member `name` relative to the `prefix` folder,
+    or `None` if it's not inside of it."""
+    path = posixpath.normpath(name).lstrip("/")
+    if path == "." or path.startswith("../"):
+        return None
+    if not path.startswith(prefix):
+        return None
+    return path[len(prefix):]
+
+
+class ArchiveSource(ListedSource):
+    """A project template read directly from a zip or tar archive, without
+    extracting it.
+
+    The index of the archive is read once. The members are read (or copied
+    to the destination) one by one, in chunks. An uncompressed tar archive is
+    memory-mapped, so its members are read without any extra copy.
+
+    Arguments:
+
+        archive (str):
+            Path to a `.zip`, `.tar`, `.tar.gz`, `.tar.bz2`, or `.tar.xz` file.
+
+        subdirectory (str):
+            Optional folder of the archive where the project template is.
+
+    """
+
+    _process_state = ("_handle", "_mmap")
+    _handle = None
+    _mmap = None
+
+    def __init__(self, archive, subdirectory=None):
+        self.archive = str(Path(archive).resolve())
+        self.is_zip = zipfile.is_zipfile(self.archive)
+        self.folders = {"": ([], [])}
+        self.files = {}
+
+        prefix = subdirectory.strip("/") + "/" if subdirectory else ""
+        with self._get_lock():
+            self._list(prefix)
+        if prefix and not any(self.folders[""]):
+            self.close()
+            raise ValueError("Project template not found")
+
+    def read_bytes(self, path):
+        member = self._get_file(path)
+        with self._get_lock():
+            if self._can_map(member):
+                start = member.offset_data
+                return self._mmap[start:start + member.size]
+            with self._open(member) as f:
+                return f.read()
+
+    def copy_file(self, path, dst):
+        member = self._get_file(path)
+        with self._get_lock():
+            if self._can_map(member):
+                start = member.offset_data
+                with memoryview(self._mmap) as view:
+                    dst.write_bytes(view[start:start + member.size])
+            else:
+                with self._open(member) as fsrc, dst.open("wb") as fdst:
+                    shutil.copyfileobj(fsrc, fdst)
+        if self._get_mode(member) & 0o111:
+            os.chmod(str(dst), 0o755)
+
+    def get_mode(self, path):
+        member = self._get_file(path)
+        return 0o755 if self._get_mode(member) & 0o111 else 0o644
+
+    def get_size(self, path):
+        return self._get_size(self._get_file(path))
+
+    def is_identical(self, path, dst, dst_stat=None):
+        member = self._get_file(path)
+        if (dst_stat or os.stat(str(dst))).st_size != self._get_size(member):
+            return False
+        return file_has_content(dst, self.read_bytes(path))
+
+    def fingerprint(self, path):
+        member = self._get_file(path)
+        if self.is_zip:
+            return f"{member.file_size}-{member.CRC}"
+        return f"{member.size}-{member.mtime}-{member.chksum}"
+
+    def close(self):
+        if self._pid == os.getpid():
+            if self._mmap:
+                self._mmap.close()
+            if self._handle:
+                self._handle.close()
+        self._mmap = None
+        self._handle = None
+
+    def _get_handle(self):
+        if self._handle is None:
+            if self.is_zip:
+                self._handle = zipfile.ZipFile(self.archive)
+            else:
+                self._handle = tarfile.open(self.archive)
+        return self._handle
+
+    def _can_map(self, member):
+        """Returns `True` if the member can be read from the memory-mapped
+        archive. Only possible with uncompressed tar archives."""
+        return bool(self._get_mmap()) and not member.issparse()
+
+    def _get_mmap(self):
+        if self._mmap is None and not self.is_zip:
+            with open(self.archive, "rb") as f:
+                magic = f.read(2)
+                # Compressed with gzip, bzip2, or xz
+                if magic in (b"\x1f\x8b", b"BZ", b"\xfd7"):
+                    self._mmap = False
+                else:
+                    self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def _open(self, member):
+        if self.is_zip:
+            return self._get_handle().open(member)
+        return self._get_handle().extractfile(member)
+
+    def _get_size(self, member):
+        return member.file_size if self.is_zip else member.size
+
+    def _get_mode(self, member):
+        if self.is_zip:
+            return member.external_attr >> 16
+        return member.mode
+
+    def _get_entries(self):
+        """Yields the name, member, and kind ("dir", "file", or "link") of the
+        members of the archive. Other kinds, like devices, are ignored."""
+        handle = self._get_handle()
+        if self.is_zip:
+            for info in handle.infolist():
+                yield info.filename, info, "dir" if info.is_dir() else "file"
+            return
+        for info in handle.getmembers():
+            if info.isdir():
+                yield info.name, info, "dir"
+            elif info.issym() or info.islnk():
+                yield info.name, info, "link"
+            elif info.isfile():
+                yield info.name, info, "file"
+
+    def _list(self, prefix):
+        folders, members = self.folders, self.files
+        links = []
+        for name, member, kind in self._get_entries():
+            path = _get_relpath(name, prefix)
+            if not path:
+                continue
+            if kind == "dir":
+                self._add_folder(path)
+                continue
+            parent, filename = posixpath.split(path)
+            self._add_folder(parent)
+            if path in members or filename in folders[parent][1]:
+                continue  # A member added twice. The first one wins.
+            folders[parent][1].append(filename)
+            if kind == "link":
+                links.append((path, member))
+            else:
+                members[path] = member
+        self._resolve_links(links, prefix)
+
+    def _resolve_links(self, links, prefix):
+        folders, members = self.folders, self.files
+        for path, member in links:
+            if member.issym():
+                target = posixpath.normpath(
+                    posixpath.join(posixpath.dirname(path), member.linkname)
+                )
+            else:
+                target = _get_relpath(member.linkname, prefix)
+            if target in members:
+                members[path] = members[target]
+            else:
+                # A link to a folder or outside the project
+                parent, name = posixpath.split(path)
+                folders[parent][1].remove(name)
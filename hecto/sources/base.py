@@ -0,0 +1,152 @@
+from hashlib import sha1
+from pathlib import PurePosixPath
+import io
+import os
+import posixpath
+import threading
+
+import jinja2
+
+from ..utils import file_has_content
+
+
+__all__ = ("ListedSource", "Source", "SourceLoader")
+
+
+class Source(object):
+    """The base class of the places where a project template can be read from.
+
+    A source has a root `path`, and the paths of its files and folders are
+    always relative to it (eg: `source.path / "doc" / "readme.md"`).
+    The sources that are not folders in the filesystem, must implement at
+    least `walk()`, `exists()`, and `read_bytes()`.
+    """
+
+    path = None
+
+    def walk(self):
+        """Like `os.walk(str(self.path))`. The folders are visited top-down,
+        and removing names from the `dirnames` list prevents the walk from
+        descending into them."""
+        raise NotImplementedError
+
+    def exists(self, path):
+        raise NotImplementedError
+
+    def read_bytes(self, path):
+        raise NotImplementedError
+
+    def read_text(self, path):
+        return self.read_bytes(path).decode("utf8")
+
+    def open(self, path):
+        """Returns a binary file object to read the file at `path`."""
+        return io.BytesIO(self.read_bytes(path))
+
+    def get_mode(self, path):
+        """Returns the permissions of the file at `path`."""
+        return 0o644
+
+    def get_size(self, path):
+        """Returns the size of the file at `path`."""
+        return len(self.read_bytes(path))
+
+    def copy_file(self, path, dst):
+        dst.write_bytes(self.read_bytes(path))
+
+    def is_identical(self, path, dst, dst_stat=None):
+        """Returns `True` if the file at `path` has the same content
+        as the file `dst` in the filesystem. The `os.stat()` of `dst`, if
+        already known, saves reading it again."""
+        size = dst_stat.st_size if dst_stat else None
+        return file_has_content(dst, self.read_bytes(path), size=size)
+
+    def fingerprint(self, path):
+        """Returns a string that changes if the file at `path` changes."""
+        return sha1(self.read_bytes(path)).hexdigest()
+
+    def get_loader(self):
+        return SourceLoader(self)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class ListedSource(Source):
+    """The base class of the sources that list all their folders and files
+    up front, so they only have to read them.
+
+    Their `folders` are a dict of the relative path of each folder (with "/"
+    as separator, and "" for the root) to its `(dirnames, filenames)`, and
+    their `files` a dict of the relative path of each file to whatever is
+    needed to read it.
+
+    The lock returned by `_get_lock()`, and the attributes named in
+    `_process_state` (eg: open files), are only valid in the process that
+    made them. They are never pickled, and are made again after a fork.
+    """
+
+    path = PurePosixPath("/")
+    folders = None
+    files = None
+    _process_state = ()
+    _pid = None
+    _lock = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.update(dict.fromkeys(("_pid", "_lock") + self._process_state))
+        return state
+
+    def walk(self, folder=""):
+        dirnames, filenames = self.folders[folder]
+        dirnames = list(dirnames)
+        yield str(self.path / folder), dirnames, list(filenames)
+        for name in dirnames:
+            yield from self.walk(posixpath.join(folder, name))
+
+    def exists(self, path):
+        return self._relpath(path) in self.files
+
+    def _relpath(self, path):
+        return str(path).replace(str(self.path), "", 1).lstrip("/")
+
+    def _get_file(self, path):
+        return self.files[self._relpath(path)]
+
+    def _add_folder(self, path):
+        """Adds the folder at `path`, and its parents, to the `folders`."""
+        if path in self.folders:
+            return
+        parent, name = posixpath.split(path)
+        self._add_folder(parent)
+        self.folders[path] = ([], [])
+        self.folders[parent][0].append(name)
+
+    def _get_lock(self):
+        if self._pid != os.getpid():
+            self._lock = threading.Lock()
+            for name in self._process_state:
+                setattr(self, name, None)
+            self._pid = os.getpid()
+        return self._lock
+
+
+class SourceLoader(jinja2.BaseLoader):
+    """A Jinja loader that reads the templates from a `Source`."""
+
+    def __init__(self, source):
+        self.source = source
+
+    def get_source(self, environment, template):
+        path = self.source.path.joinpath(*template.split("/"))
+        if not self.source.exists(path):
+            raise jinja2.TemplateNotFound(template)
+        text = self.source.read_text(path)
+        return text, str(path), lambda: True
@@ -0,0 +1,69 @@
+import os
+import threading
+
+from .local import LocalSource
+
+
+__all__ = ("CachedSource", )
+
+
+class CachedSource(object):
+    """Wraps another source so each one of its folders is listed only once,
+    no matter how many times it is walked. Everything else is read from the
+    source.
+
+    The folders are listed the first time a walk gets to them, so the ones
+    pruned by every walk (eg: `.git` or `node_modules`) are never listed.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.path = source.path
+        self.folders = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.source, name)
+
+    def walk(self):
+        if not isinstance(self.source, LocalSource):
+            # The other sources have their files already listed in memory
+            return self.source.walk()
+        return self._walk(str(self.path))
+
+    def _walk(self, folder):
+        listing = self._get_listing(folder)
+        if listing is None:
+            return  # Like `os.walk()`, skip the folders that can't be listed
+        dirnames, files, links = listing
+        dirnames = list(dirnames)
+        yield folder, dirnames, list(files)
+        for name in dirnames:
+            # Like `os.walk()`, don't follow the links to folders
+            if name not in links:
+                yield from self._walk(os.path.join(folder, name))
+
+    def _get_listing(self, folder):
+        try:
+            return self.folders[folder]
+        except KeyError:
+            pass
+        with self._lock:
+            if folder not in self.folders:
+                self.folders[folder] = self._list(folder)
+            return self.folders[folder]
+
+    def _list(self, folder):
+        dirnames, files, links = [], [], set()
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        dirnames.append(entry.name)
+                        if entry.is_symlink():
+                            links.add(entry.name)
+                    else:
+                        files.append(entry.name)
+        except OSError:
+            return None
+        return tuple(dirnames), tuple(files), frozenset(links)
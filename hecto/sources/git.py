@@ -0,0 +1,143 @@
+import os
+import posixpath
+import subprocess
+
+from ..utils import file_has_content
+from .base import ListedSource
+
+
+__all__ = ("GitSource", )
+
+LINK_MODE = "120000"
+EXEC_MODE = "100755"
+
+
+class GitSource(ListedSource):
+    """A project template read directly from the objects of a git repository,
+    without a checkout.
+
+    The tree of `ref` (or of its `subdirectory`) is listed once with
+    `git ls-tree` and the contents of the files are read from a long-running
+    `git cat-file --batch` process.
+
+    Arguments:
+
+        repo (str):
+            Path to a local repository. It can be a bare one.
+
+        ref (str):
+            A branch, tag, or commit. By default, the current HEAD.
+
+        subdirectory (str):
+            Optional folder of the repository where the project template is.
+
+    """
+
+    _process_state = ("_batch", )
+    _batch = None
+
+    def __init__(self, repo, ref=None, subdirectory=None):
+        self.repo = str(repo)
+        self.commit = self._git(
+            "rev-parse", "--verify", "-q", f"{ref or 'HEAD'}^{{commit}}"
+        ).strip()
+        treeish = self.commit
+        if subdirectory:
+            treeish += ":" + subdirectory.strip("/")
+        self.folders, self.files = self._list(treeish)
+
+    def read_bytes(self, path):
+        _, sha, _ = self._get_file(path)
+        return self.cat_file(sha)
+
+    def copy_file(self, path, dst):
+        mode, sha, _ = self._get_file(path)
+        dst.write_bytes(self.cat_file(sha))
+        if mode == EXEC_MODE:
+            os.chmod(str(dst), 0o755)
+
+    def get_mode(self, path):
+        mode, _, _ = self._get_file(path)
+        return 0o755 if mode == EXEC_MODE else 0o644
+
+    def get_size(self, path):
+        return self._get_file(path)[2]
+
+    def is_identical(self, path, dst, dst_stat=None):
+        # The size is in the listing, so the blob is read only if it matches
+        _, sha, size = self._get_file(path)
+        if (dst_stat or os.stat(str(dst))).st_size != size:
+            return False
+        return file_has_content(dst, self.cat_file(sha))
+
+    def fingerprint(self, path):
+        return self._get_file(path)[1]
+
+    def cat_file(self, sha):
+        """Returns the content of the object `sha`."""
+        with self._get_lock():
+            batch = self._get_batch()
+            batch.stdin.write(sha.encode() + b"\n")
+            batch.stdin.flush()
+            header = batch.stdout.readline().split()
+            if len(header) != 3:
+                raise ValueError(f"Object {sha} not found in {self.repo}")
+            size = int(header[2])
+            data = batch.stdout.read(size)
+            batch.stdout.read(1)  # The newline at the end
+            return data
+
+    def close(self):
+        if self._batch and self._pid == os.getpid():
+            self._batch.stdin.close()
+            self._batch.wait()
+        self._batch = None
+
+    def _git(self, *args):
+        return subprocess.check_output(
+            ["git", "-C", self.repo] + list(args)
+        ).decode("utf8")
+
+    def _get_batch(self):
+        if self._batch is None:
+            self._batch = subprocess.Popen(
+                ["git", "-C", self.repo, "cat-file", "--batch"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+            )
+        return self._batch
+
+    def _list(self, treeish):
+        folders = {"": ([], [])}
+        blobs = {}
+        links = []
+        output = self._git("ls-tree", "-r", "-t", "-l", "-z", treeish)
+        for line in output.split("\0"):
+            if not line:
+                continue
+            meta, path = line.split("\t", 1)
+            mode, kind, sha, size = meta.split()
+            parent, name = posixpath.split(path)
+            if kind == "tree":
+                folders[path] = ([], [])
+                folders[parent][0].append(name)
+            elif kind == "blob":
+                folders[parent][1].append(name)
+                if mode == LINK_MODE:
+                    links.append((path, sha))
+                else:
+                    blobs[path] = (mode, sha, int(size))
+            # Submodules are ignored
+
+        for path, sha in links:
+            target = self.cat_file(sha).decode("utf8")
+            target = posixpath.normpath(
+                posixpath.join(posixpath.dirname(path), target)
+            )
+            if target in blobs:
+                blobs[path] = blobs[target]
+            else:
+                # A link to a folder or outside the project
+                parent, name = posixpath.split(path)
+                folders[parent][1].remove(name)
+        return folders, blobs
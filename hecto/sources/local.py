@@ -0,0 +1,65 @@
+import os
+import stat
+from pathlib import Path
+
+import jinja2
+
+from ..utils import files_are_identical, get_copy_strategy
+from .base import Source
+
+
+__all__ = ("LocalSource", )
+
+
+class LocalSource(Source):
+    """A project template in a folder of the filesystem.
+
+    The files are copied with the `copy_strategy` function (or the name of
+    one of `COPY_STRATEGIES`). By default, `shutil.copy2`.
+    """
+
+    def __init__(self, path, copy_strategy=None):
+        path = Path(path).resolve()
+        if not path.exists():
+            raise ValueError("Project template not found")
+
+        if not path.is_dir():
+            raise ValueError("The project template must be a folder")
+
+        self.path = path
+        self._copy_file = get_copy_strategy(copy_strategy)
+
+    def walk(self):
+        return os.walk(str(self.path))
+
+    def exists(self, path):
+        return Path(path).exists()
+
+    def read_bytes(self, path):
+        return Path(path).read_bytes()
+
+    def read_text(self, path):
+        return Path(path).read_text()
+
+    def open(self, path):
+        return open(str(path), "rb")
+
+    def get_mode(self, path):
+        return stat.S_IMODE(os.stat(str(path)).st_mode)
+
+    def get_size(self, path):
+        return os.stat(str(path)).st_size
+
+    def copy_file(self, path, dst):
+        self._copy_file(path, dst)
+
+    def is_identical(self, path, dst, dst_stat=None):
+        return files_are_identical(path, dst, dst_stat)
+
+    def fingerprint(self, path):
+        stat = os.stat(str(path))
+        return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+    def get_loader(self):
+        # Jinja <= 2.10 does not work with `pathlib.Path`s
+        return jinja2.FileSystemLoader(str(self.path))
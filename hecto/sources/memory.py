@@ -0,0 +1,54 @@
+from collections.abc import Mapping
+import posixpath
+
+import jinja2
+
+from .base import ListedSource
+
+
+__all__ = ("MemorySource", )
+
+
+class MemorySource(ListedSource):
+    """A project template in memory: a dict of relative paths (with "/" as
+    separator) to the content of the files, as bytes or text.
+
+    Eg: `MemorySource({"README.md.tmpl": "# [[ name ]]", "img/logo.png": data})`
+
+    The folders are implied by the paths of the files.
+    """
+
+    def __init__(self, files):
+        self.files = {}
+        self.folders = {"": ([], [])}
+        for name, content in files.items():
+            name = posixpath.normpath(name).strip("/")
+            if isinstance(content, str):
+                content = content.encode("utf8")
+            parent, filename = posixpath.split(name)
+            self._add_folder(parent)
+            if name not in self.files:
+                self.folders[parent][1].append(filename)
+            self.files[name] = content
+
+    def read_bytes(self, path):
+        return self._get_file(path)
+
+    def get_loader(self):
+        return jinja2.DictLoader(TextMapping(self.files))
+
+
+class TextMapping(Mapping):
+    """A read-only view of a dict of bytes, decoded as UTF-8 when read."""
+
+    def __init__(self, files):
+        self.files = files
+
+    def __getitem__(self, name):
+        return self.files[name].decode("utf8")
+
+    def __iter__(self):
+        return iter(self.files)
+
+    def __len__(self):
+        return len(self.files)
@@ -0,0 +1,112 @@
+from importlib import import_module
+from pathlib import Path
+import os
+import posixpath
+import stat
+import threading
+
+from .base import ListedSource
+
+
+__all__ = ("is_package_url", "PackageSource")
+
+PACKAGE_PREFIX = "pkg://"
+
+# The listings of the resources, by package and folder, for this process
+_listings = {}
+_listings_lock = threading.Lock()
+
+
+def is_package_url(url):
+    return str(url).startswith(PACKAGE_PREFIX)
+
+
+class PackageSource(ListedSource):
+    """A project template inside of an installed Python package, read with
+    `importlib.resources`, so it works even if the package is imported from
+    a zip file or a wheel. With Python < 3.9, only packages installed as
+    folders can be read.
+
+    `url` has the form "pkg://package.name/path/to/folder". The listing of
+    the resources is cached, so it is done only once per process.
+    """
+
+    def __init__(self, url, subdirectory=None):
+        url = str(url)[len(PACKAGE_PREFIX):]
+        package, _, folder = url.partition("/")
+        if subdirectory:
+            folder = posixpath.join(folder, subdirectory)
+        folder = posixpath.normpath(folder or ".").strip("/")
+        self.package = package
+        self.folder = "" if folder == "." else folder
+        self.folders, self.files = get_listing(self.package, self.folder)
+
+    def read_bytes(self, path):
+        return self._get_file(path).read_bytes()
+
+    def open(self, path):
+        return self._get_file(path).open("rb")
+
+    def get_mode(self, path):
+        resource = self._get_file(path)
+        if isinstance(resource, Path):
+            return stat.S_IMODE(resource.stat().st_mode)
+        return 0o644
+
+
+def get_listing(package, folder):
+    """Returns the folders and files of the `folder` of the `package`,
+    listed only once per process."""
+    key = (package, folder)
+    with _listings_lock:
+        listing = _listings.get(key)
+        if listing is None:
+            listing = _listings[key] = _list(package, folder)
+    return listing
+
+
+def _get_root(package):
+    """Returns the root folder of the `package`, as a `Path` or an
+    `importlib.resources` traversable."""
+    try:
+        module = import_module(package)
+    except ImportError:
+        raise ValueError("Project template not found")
+
+    try:
+        from importlib import resources
+    except ImportError:  # pragma: no cover
+        resources = None  # Python 3.6
+    files = getattr(resources, "files", None)
+    if files:  # Python 3.9+
+        return files(module)
+    for location in getattr(module, "__path__", None) or []:
+        if os.path.isdir(location):
+            return Path(location)
+    raise ValueError(
+        "Reading project templates from zipped packages needs Python 3.9+"
+    )
+
+
+def _list(package, folder):
+    root = _get_root(package)
+    for name in folder.split("/") if folder else []:
+        root = root.joinpath(name)
+    if not root.is_dir():
+        raise ValueError("Project template not found")
+
+    folders = {}
+    files = {}
+    pending = [("", root)]
+    while pending:
+        rel_folder, traversable = pending.pop()
+        dirnames, filenames = folders[rel_folder] = ([], [])
+        for child in sorted(traversable.iterdir(), key=lambda child: child.name):
+            rel_path = posixpath.join(rel_folder, child.name)
+            if child.is_dir():
+                dirnames.append(child.name)
+                pending.append((rel_path, child))
+            elif child.is_file():
+                filenames.append(child.name)
+                files[rel_path] = child
+    return folders, files
@@ -1,6 +1,10 @@
+from .bytecode_cache import *  # noqa
+from .executors import *  # noqa
 from .files import *  # noqa
 from .jinja_render import *  # noqa
 from .load_config import *  # noqa
 from .make_matcher import *  # noqa
+from .manifest import *  # noqa
 from .printf import *  # noqa
 from .prompt import *  # noqa
+from .walk import *  # noqa
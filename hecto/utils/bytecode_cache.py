@@ -0,0 +1,145 @@
+import os
+
+from jinja2 import FileSystemBytecodeCache
+from jinja2.bccache import BytecodeCache as BaseBytecodeCache
+
+
+__all__ = ("BytecodeCache", "make_bytecode_cache", "MemoryBytecodeCache")
+
+DEFAULT_MAX_SIZE = 100 * 1024 * 1024  # 100 MB
+
+# Environment options that change how a template is compiled
+ENV_KEYS = (
+    "block_start_string",
+    "block_end_string",
+    "variable_start_string",
+    "variable_end_string",
+    "comment_start_string",
+    "comment_end_string",
+    "line_statement_prefix",
+    "line_comment_prefix",
+    "trim_blocks",
+    "lstrip_blocks",
+    "newline_sequence",
+    "keep_trailing_newline",
+    "autoescape",
+    "optimized",
+)
+
+
+def _get_env_key(environment):
+    values = [type(environment).__name__]
+    values.extend(repr(getattr(environment, key, None)) for key in ENV_KEYS)
+    values.extend(sorted(environment.extensions))
+    return "|".join(values)
+
+
+class EnvironmentKeyMixin(object):
+    """Includes the environment options that change how a template is compiled
+    in its cache key."""
+
+    def get_bucket(self, environment, name, filename, source):
+        name = f"{name}|{_get_env_key(environment)}"
+        return super().get_bucket(environment, name, filename, source)
+
+
+class BytecodeCache(EnvironmentKeyMixin, FileSystemBytecodeCache):
+    """A Jinja bytecode cache, stored in a folder, so repeated runs don't
+    have to compile the templates again.
+
+    The cache key of each template includes the options that change how it is
+    compiled (like the custom `[[ ]]` delimiters) and its source is validated
+    with a checksum, so an outdated version is never used.
+
+    When the total size of the cache is over `max_size` bytes, the least
+    recently used templates are deleted.
+    """
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        directory = str(directory)
+        os.makedirs(directory, exist_ok=True)
+        super().__init__(directory)
+        self.max_size = max_size
+
+    def load_bytecode(self, bucket):
+        super().load_bytecode(bucket)
+        if bucket.code is None:
+            return
+        try:
+            # Mark it as recently used
+            os.utime(self._get_cache_filename(bucket))
+        except OSError:  # pragma: no cover
+            pass
+
+    def dump_bytecode(self, bucket):
+        super().dump_bytecode(bucket)
+        if self.max_size:
+            self.evict()
+
+    def evict(self):
+        """Deletes the least recently used templates until the size
+        of the cache is under `max_size`."""
+        prefix, _, suffix = self.pattern.partition("%s")
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not (entry.name.startswith(prefix) and entry.name.endswith(suffix)):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:  # pragma: no cover
+                pass
+            total -= size
+
+
+class MemoryBytecodeCache(EnvironmentKeyMixin, BaseBytecodeCache):
+    """Keeps the compiled templates in memory, so they can be shared
+    by many environments (eg: one for each `copy()` with different data).
+
+    If another bytecode `cache` is used, the templates not found in memory
+    are looked up there, and the new ones are also saved there.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache
+        self.buckets = {}
+
+    def __getstate__(self):
+        # Code objects can't be pickled
+        return {"cache": self.cache, "buckets": {}}
+
+    def load_bytecode(self, bucket):
+        found = self.buckets.get(bucket.key)
+        if found and found[0] == bucket.checksum:
+            bucket.code = found[1]
+            return
+        if self.cache is None:
+            return
+        self.cache.load_bytecode(bucket)
+        if bucket.code is not None:
+            self.buckets[bucket.key] = (bucket.checksum, bucket.code)
+
+    def dump_bytecode(self, bucket):
+        self.buckets[bucket.key] = (bucket.checksum, bucket.code)
+        if self.cache is not None:
+            self.cache.dump_bytecode(bucket)
+
+    def clear(self):
+        self.buckets = {}
+
+
+def make_bytecode_cache(cache):
+    """Returns a `BytecodeCache` for `cache`, a folder path, unless
+    it already is a bytecode cache."""
+    if cache is None or hasattr(cache, "get_bucket"):
+        return cache
+    return BytecodeCache(cache)
@@ -0,0 +1,62 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+__all__ = ("completed", "Deferred", "make_executor", "SerialExecutor")
+
+
+def completed(result):
+    """Returns an already finished future with this result."""
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+class Deferred(object):
+    """A future-like object that calls `fn` with the result of another future
+    the first time its own result is requested.
+    """
+
+    def __init__(self, future, fn):
+        self.future = future
+        self.fn = fn
+
+    def done(self):
+        return self.future.done()
+
+    def result(self):
+        if self.fn is not None:
+            self._result = self.fn(self.future.result())
+            self.fn = None
+        return self._result
+
+
+class SerialExecutor(object):
+    """An executor that runs each task as soon as it is submitted,
+    in the calling thread.
+    """
+
+    def submit(self, fn, *args, **kwargs):
+        try:
+            return completed(fn(*args, **kwargs))
+        except BaseException as e:
+            future = Future()
+            future.set_exception(e)
+            return future
+
+    def shutdown(self, wait=True):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+
+
+def make_executor(workers=None):
+    """Returns a pool of `workers` threads or, if `workers` is less than two,
+    an executor that runs the tasks one after the other.
+    """
+    if not workers or workers < 2:
+        return SerialExecutor()
+    return ThreadPoolExecutor(max_workers=workers)
@@ -1,8 +1,32 @@
+from hashlib import sha1
+from pathlib import Path
+from uuid import uuid4
 import errno
+import locale
 import os
 import shutil
 
 
+__all__ = (
+    "copy_file",
+    "COPY_STRATEGIES",
+    "encode_content",
+    "fast_copy_file",
+    "file_has_content",
+    "files_are_identical",
+    "get_content_digest",
+    "get_copy_strategy",
+    "link_file",
+    "make_folder",
+    "reflink_file",
+    "StreamedFile",
+)
+
+CHUNK_SIZE = 64 * 1024
+RANGE_SIZE = 1024 * 1024 * 1024
+FICLONE = 0x40049409  # From linux/fs.h
+
+
 def make_folder(folder, pretend=False):
     if pretend:
         return
@@ -16,3 +40,207 @@ def make_folder(folder, pretend=False):
 
 def copy_file(src, dst):
     shutil.copy2(str(src), str(dst))
+
+
+def fast_copy_file(src, dst):
+    """Copies only the content and the permissions of the file, without
+    the rest of its metadata. When possible, the content is copied by the
+    kernel (with `copy_file_range` or `sendfile`), without reading it."""
+    src, dst = str(src), str(dst)
+    if not _copy_file_range(src, dst):
+        shutil.copyfile(src, dst)  # Uses `sendfile` if available
+    shutil.copymode(src, dst)
+
+
+def _copy_file_range(src, dst):
+    copy_range = getattr(os, "copy_file_range", None)
+    if not copy_range:  # pragma: no cover
+        return False
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            while copy_range(fsrc.fileno(), fdst.fileno(), RANGE_SIZE):
+                pass
+        except OSError:  # pragma: no cover
+            # Eg: not supported by the filesystem
+            return False
+    return True
+
+
+def reflink_file(src, dst):
+    """Clones the file with a copy-on-write reflink, so no data is copied
+    until one of them is modified. Only some filesystems (like Btrfs or XFS)
+    support it, otherwise it falls back to `fast_copy_file()`."""
+    try:
+        import fcntl
+    except ImportError:  # pragma: no cover
+        return fast_copy_file(src, dst)
+
+    try:
+        with open(str(src), "rb") as fsrc, open(str(dst), "wb") as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    except OSError:
+        return fast_copy_file(src, dst)
+    shutil.copymode(str(src), str(dst))
+
+
+def link_file(src, dst):
+    """Makes the destination a hard link to the source file. Any change to
+    one of them changes the other, so use it only for read-only files.
+    If it can't be done (eg: they are in different filesystems), it falls
+    back to `fast_copy_file()`."""
+    dst = Path(dst)
+    tmp_path = dst.with_name(f".{dst.name}.{uuid4().hex[:12]}.tmp")
+    try:
+        os.link(str(src), str(tmp_path))
+    except OSError:
+        return fast_copy_file(src, dst)
+    os.replace(str(tmp_path), str(dst))
+
+
+COPY_STRATEGIES = {
+    "copy": copy_file,
+    "fast": fast_copy_file,
+    "reflink": reflink_file,
+    "hardlink": link_file,
+}
+
+
+def get_copy_strategy(strategy=None):
+    """Returns the function used to copy the files that aren't templates:
+    "copy" (the default), "fast", "reflink", "hardlink", or a function
+    that takes the source and destination paths."""
+    if callable(strategy):
+        return strategy
+    try:
+        return COPY_STRATEGIES[strategy or "copy"]
+    except KeyError:
+        raise ValueError(f"Unknown copy strategy: {strategy!r}")
+
+
+def files_are_identical(path1, path2, stat2=None):
+    """Compares the sizes of the files first, and then their contents, in
+    chunks, until the first difference. The `os.stat()` of `path2`, if
+    already known, saves reading it again."""
+    stat1 = os.stat(str(path1))
+    stat2 = stat2 or os.stat(str(path2))
+    if os.path.samestat(stat1, stat2):
+        return True  # Eg: hard links
+    if stat1.st_size != stat2.st_size:
+        return False
+    with open(str(path1), "rb") as f1, open(str(path2), "rb") as f2:
+        while True:
+            chunk = f1.read(CHUNK_SIZE)
+            if chunk != f2.read(CHUNK_SIZE):
+                return False
+            if not chunk:
+                return True
+
+
+def file_has_content(path, data, digest=None, size=None):
+    """Returns `True` if the file at `path` contains exactly the bytes `data`.
+
+    The size of the file (read now, unless given) is compared first. Then, if
+    the SHA1 `digest` of the file is known (and still valid), it is compared
+    instead of reading it. Otherwise the file is read in chunks, until the
+    first difference.
+    """
+    if size is None:
+        try:
+            size = os.stat(str(path)).st_size
+        except FileNotFoundError:
+            return False
+    if size != len(data):
+        return False
+    if digest:
+        return digest == sha1(data).hexdigest()
+
+    data = memoryview(data)
+    with open(str(path), "rb") as f:
+        for start in range(0, size, CHUNK_SIZE):
+            chunk = f.read(CHUNK_SIZE)
+            if chunk != data[start:start + CHUNK_SIZE]:
+                return False
+    return True
+
+
+def encode_content(content):
+    """Returns the bytes that `path.write_text(content)` would write."""
+    if os.linesep != "\n":  # pragma: no cover
+        content = content.replace("\n", os.linesep)
+    return content.encode(locale.getpreferredencoding(False))
+
+
+def get_content_digest(content):
+    """Returns the SHA1 of the rendered `content`, a string or a
+    `StreamedFile`."""
+    if isinstance(content, str):
+        return sha1(encode_content(content)).hexdigest()
+    return content.digest
+
+
+class StreamedFile(object):
+    """A rendered file, written chunk by chunk to a temporary file next to
+    its final `path`, so only one chunk is in memory at a time.
+
+    While writing it, the chunks are also compared with the current content
+    of `path` (if any), so `streamed.identical` tells if it must be saved at
+    all. Call `save()` to move it to `path`, or `discard()` to delete it.
+    If `write` is `False`, the chunks are only compared. If it's already
+    known if `path` `exists`, the filesystem isn't asked again.
+    """
+
+    def __init__(self, chunks, path, write=True, exists=None):
+        self.path = Path(path)
+        self.tmp_path = None
+        if exists is None:
+            exists = self.path.exists()
+        self.exists = exists
+        digest = sha1()
+        size = 0
+        tmp = None
+        current = None
+        identical = exists
+        try:
+            if identical:
+                current = self.path.open("rb")
+            if write:
+                self.tmp_path = self.path.with_name(
+                    f".{self.path.name}.{uuid4().hex[:12]}.tmp"
+                )
+                tmp = self.tmp_path.open("xb")
+            for chunk in chunks:
+                data = encode_content(chunk)
+                digest.update(data)
+                size += len(data)
+                if tmp:
+                    tmp.write(data)
+                if identical and current.read(len(data)) != data:
+                    identical = False
+            if identical and current.read(1):
+                identical = False
+        except BaseException:
+            self.discard()
+            raise
+        finally:
+            if current:
+                current.close()
+            if tmp:
+                tmp.close()
+
+        self.identical = identical
+        self.digest = digest.hexdigest()
+        self.size = size
+
+    def save(self):
+        if self.exists:
+            shutil.copymode(str(self.path), str(self.tmp_path))
+        os.replace(str(self.tmp_path), str(self.path))
+        self.tmp_path = None
+
+    def discard(self):
+        if self.tmp_path:
+            try:
+                self.tmp_path.unlink()
+            except FileNotFoundError:  # pragma: no cover
+                pass
+            self.tmp_path = None
@@ -1,33 +1,210 @@
+from concurrent.futures import ProcessPoolExecutor
+from importlib import import_module
 import os
+import sys
 
 import jinja2
+from jinja2 import meta
+from jinja2.defaults import DEFAULT_NAMESPACE
 from jinja2.sandbox import SandboxedEnvironment
 
+from .files import StreamedFile
 
-__all__ = ("ENVOPS_DEFAULT", "JinjaRender")
+
+__all__ = ("ENVOPS_DEFAULT", "JinjaRender", "make_render_pool", "render_in_worker")
 
 ENVOPS_DEFAULT = {"autoescape": False, "keep_trailing_newline": True}
 
 
 class JinjaRender(object):
-    def __init__(self, src_path, data=None, filters=None, envops=None):
+    """Renders the templates of a project.
+
+    By default, the templates run in a sandbox. If they are `trusted`, a
+    plain Jinja environment is used instead, without the overhead of
+    checking every attribute access and call made by them.
+    """
+
+    def __init__(
+        self,
+        src_path,
+        data=None,
+        filters=None,
+        envops=None,
+        name_cache=None,
+        trusted=False,
+    ):
         # Jinja <= 2.10 does not work with `pathlib.Path`s
         self.src_path = str(src_path)
+        self.data = data or {}
 
         _envops = ENVOPS_DEFAULT.copy()
         _envops.update(envops or {})
         _envops.setdefault("loader", jinja2.FileSystemLoader(self.src_path))
-        self.env = SandboxedEnvironment(**_envops)
+        env_class = jinja2.Environment if trusted else SandboxedEnvironment
+        self.env = env_class(**_envops)
         if filters:
-            self.env.filters.update(**data)
+            self.env.filters.update(**filters)
         if data:
             self.env.globals.update(**data)
+        self._meta_env = None
+
+        self.markers = [
+            self.env.block_start_string,
+            self.env.variable_start_string,
+            self.env.comment_start_string,
+        ]
+        self.markers.extend(
+            marker for marker in (
+                self.env.line_statement_prefix, self.env.line_comment_prefix
+            ) if marker
+        )
+        # The rendered names, only valid for this data
+        self._names = {}
+        # The compiled names, can be shared by renders with the same `envops`
+        self._name_cache = {} if name_cache is None else name_cache
 
     def __call__(self, fullpath, **data):
-        relpath = str(fullpath).replace(self.src_path, "", 1).lstrip(os.path.sep)
-        tmpl = self.env.get_template(relpath)
+        tmpl = self.env.get_template(self.get_name(fullpath))
         return tmpl.render(**data)
 
+    def stream(self, fullpath, **data):
+        """Like calling it, but returns the rendered text in chunks."""
+        tmpl = self.env.get_template(self.get_name(fullpath))
+        return tmpl.generate(**data)
+
+    def get_name(self, fullpath):
+        """Returns the name of the template at `fullpath`."""
+        return str(fullpath).replace(self.src_path, "", 1).lstrip(os.path.sep)
+
+    def get_dependencies(self, fullpath):
+        """Returns the sorted names of all the templates that the one at
+        `fullpath` includes, imports, or extends (directly or not), and the
+        sorted names of the variables used by any of them.
+        Returns `(None, None)` if the name of any of those templates is not
+        known until the template is rendered.
+        """
+        env = self.get_meta_env()
+        name = self.get_name(fullpath)
+        found = set()
+        variables = set()
+        pending = [name]
+        while pending:
+            source, _, _ = env.loader.get_source(env, pending.pop())
+            ast = env.parse(source)
+            variables.update(meta.find_undeclared_variables(ast))
+            for ref in meta.find_referenced_templates(ast):
+                if ref is None:
+                    return None, None
+                if ref not in found and ref != name:
+                    found.add(ref)
+                    pending.append(ref)
+        return sorted(found), sorted(variables)
+
+    def get_variables(self, string):
+        """Returns the names of the variables used in `string`."""
+        if not self.has_markers(string):
+            return set()
+        return meta.find_undeclared_variables(self.get_meta_env().parse(string))
+
+    def get_meta_env(self):
+        """The data is in the globals of the environment, so it would be
+        ignored when looking for the variables used by a template. This returns
+        an environment like it but without that data, to parse the templates.
+        """
+        if self._meta_env is None:
+            env = self.env.overlay()
+            env.globals = DEFAULT_NAMESPACE.copy()
+            self._meta_env = env
+        return self._meta_env
+
     def string(self, string, **data):
         tmpl = self.env.from_string(string)
         return tmpl.render(**data)
+
+    def has_markers(self, text):
+        """Returns `True` if `text` might have any template tags."""
+        return any(marker in text for marker in self.markers)
+
+    def render_name(self, name):
+        """Renders the name of a file or folder, or a pattern. The names
+        without any template tags are returned as they are, without using
+        Jinja, and the rest are rendered only once.
+        """
+        if not self.has_markers(name):
+            return name
+        rendered = self._names.get(name)
+        if rendered is None:
+            rendered = self._names[name] = self.get_name_template(name).render()
+        return rendered
+
+    def get_name_template(self, name):
+        code = self._name_cache.get(name)
+        if code is None:
+            code = self._name_cache[name] = self.env.compile(name)
+        return self.env.template_class.from_code(
+            self.env, code, self.env.make_globals(None)
+        )
+
+
+def get_import_path(obj):
+    """Returns the "module:name" import path of a function or a string
+    if it's already one."""
+    if isinstance(obj, str):
+        return obj
+    name = getattr(obj, "__qualname__", "")
+    if not name or "<" in name:
+        raise ValueError(f"{obj!r} must be defined at the top level of a module")
+    return f"{obj.__module__}:{name}"
+
+
+def import_string(path):
+    """Imports an object from its "module:name" import path."""
+    module, _, name = path.partition(":")
+    obj = import_module(module)
+    for attr in name.split("."):
+        obj = getattr(obj, attr)
+    return obj
+
+
+_worker_render = None
+
+
+def _init_worker(src_path, data, filters, envops, trusted):
+    global _worker_render
+    filters = {name: import_string(path) for name, path in filters.items()}
+    _worker_render = JinjaRender(
+        src_path, data, filters=filters, envops=envops, trusted=trusted
+    )
+
+
+def render_in_worker(fullpath, context, stream_to=None, write=True, exists=None):
+    """Render a template using the `JinjaRender` of this worker process.
+    If `stream_to` is a path, the template is streamed to a `StreamedFile`
+    for that path instead (`exists` tells if it already does).
+    """
+    if stream_to:
+        chunks = _worker_render.stream(fullpath, **context)
+        return StreamedFile(chunks, stream_to, write=write, exists=exists)
+    return _worker_render(fullpath, **context)
+
+
+def make_render_pool(
+    processes, src_path, data=None, filters=None, envops=None, trusted=False
+):
+    """Returns a pool of processes, each one with its own `JinjaRender` build
+    from these settings, to use with `render_in_worker()`.
+
+    Everything must be picklable, except for the filters, that are sent to the
+    workers by their import path (and so, they must be defined at the top level
+    of a module). Needs Python 3.7+.
+    """
+    if sys.version_info < (3, 7):
+        raise RuntimeError("Rendering with processes needs Python 3.7+")
+    filters = {
+        name: get_import_path(filter_) for name, filter_ in (filters or {}).items()
+    }
+    return ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_init_worker,
+        initargs=(str(src_path), data, filters, envops, trusted),
+    )
@@ -5,7 +5,7 @@ import yaml
 __all__ = ("load_config", )
 
 
-def load_config(settings, user_settings=None, src_files=None):
+def load_config(settings, user_settings=None, src_files=None, user_defaults=None):
     """
     Negotiate a group of settings from the global defaults, the user-provided
     values and config files. The keys in the `settings` argument are the only
@@ -32,6 +32,10 @@ def load_config(settings, user_settings=None, src_files=None):
             by the user_settings.
             Any key that is not in the `settings` dict is ignored.
 
+        user_defaults (dict):
+            The values already read from a config file. If used, `src_files`
+            is ignored.
+
     Examples:
 
         >>> load_config({"a": 1}, {"a": 2})
@@ -44,9 +48,10 @@ def load_config(settings, user_settings=None, src_files=None):
         {'a': 1}
 
     """
-    assert user_settings or src_files
+    assert user_settings or src_files or user_defaults is not None
     user_settings = user_settings or {}
-    user_defaults = _load_user_defaults(src_files)
+    if user_defaults is None:
+        user_defaults = _load_user_defaults(src_files)
     config = {}
 
     for key, default in settings.items():
@@ -1,9 +1,19 @@
-from fnmatch import fnmatch
-from functools import reduce
+from collections import namedtuple
+from fnmatch import translate
 import os
+import re
 import unicodedata
 
-__all__ = ("make_matcher", "make_filter", )
+__all__ = (
+    "make_matcher",
+    "make_filter",
+    "make_pruner",
+    "PathMatch",
+    "PathMatcher",
+    "PatternSet",
+)
+
+WILDCARDS = "*?["
 
 
 def _normalize_str(text, form="NFD"):
@@ -11,10 +21,88 @@ def _normalize_str(text, form="NFD"):
     return unicodedata.normalize(form, text)
 
 
-def _fullmatch(path, pattern):
-    path = _normalize_str(str(path))
-    name = os.path.basename(path)
-    return fnmatch(name, pattern) or fnmatch(path, pattern)
+def _normalize_path(path):
+    """Returns the normalized path and its name, ready to be matched."""
+    path = os.path.normcase(_normalize_str(str(path)))
+    return path, os.path.basename(path)
+
+
+def _can_match_a_name(pattern):
+    # A name can't have a path separator, unless is inside a `[...]` set
+    return os.path.sep not in pattern or "[" in pattern
+
+
+def _compile(patterns):
+    if not patterns:
+        return None
+    return re.compile("|".join(translate(pattern) for pattern in patterns))
+
+
+class PatternSet(object):
+    """A group of shell-style patterns compiled to be evaluated at once.
+
+    A path is a match if its name or the full path match any of the patterns.
+    The patterns without wildcards are looked up in a set, the rest are merged
+    into two regular expressions: one for the names and one for the full paths.
+    """
+
+    def __init__(self, patterns):
+        patterns = [os.path.normcase(_normalize_str(pattern)) for pattern in patterns]
+        wild = [pattern for pattern in patterns if any(c in pattern for c in WILDCARDS)]
+        self.literals = frozenset(patterns) - frozenset(wild)
+        self.name_re = _compile([p for p in wild if _can_match_a_name(p)])
+        self.path_re = _compile(wild)
+
+    def __call__(self, path):
+        return self.match(*_normalize_path(path))
+
+    def match(self, path, name):
+        """Like calling the pattern set but with an already normalized
+        path and its name."""
+        if name in self.literals or path in self.literals:
+            return True
+        if self.name_re is not None and self.name_re.match(name):
+            return True
+        return self.path_re is not None and self.path_re.match(path) is not None
+
+
+class PathMatch(namedtuple("PathMatch", "exclude include skip_if_exists")):
+    __slots__ = ()
+
+    @property
+    def filtered(self):
+        return self.exclude and not self.include
+
+
+class PathMatcher(object):
+    """Evaluates, normalizing each path only once, if it matches the
+    `exclude`, `include`, and `skip_if_exists` patterns.
+
+    Calling the matcher returns a `PathMatch` with all three results.
+    """
+
+    def __init__(self, exclude=None, include=None, skip_if_exists=None):
+        exclude = exclude or []
+        include = include or []
+        self.exclude = PatternSet(exclude)
+        self.include = PatternSet(include)
+        self.skip_if_exists = PatternSet(skip_if_exists or [])
+        self.must_prune = make_pruner(exclude, include)
+
+    def __call__(self, path):
+        path, name = _normalize_path(path)
+        return PathMatch(
+            self.exclude.match(path, name),
+            self.include.match(path, name),
+            self.skip_if_exists.match(path, name),
+        )
+
+    def must_filter(self, path):
+        path, name = _normalize_path(path)
+        return self.exclude.match(path, name) and not self.include.match(path, name)
+
+    def must_skip_if_exists(self, path):
+        return self.skip_if_exists(path)
 
 
 def make_matcher(patterns):
@@ -26,15 +114,7 @@ def make_matcher(patterns):
     decomposed unicode string. In those systems, u'ñ' is read as `\u0303`
     instead of `\xf1`.
     """
-    patterns = [_normalize_str(pattern) for pattern in patterns]
-
-    def path_match(path):
-        for pattern in patterns:
-            if _fullmatch(path, pattern):
-                return True
-        return False
-
-    return path_match
+    return PatternSet(patterns)
 
 
 def make_filter(must_exclude, must_include):
@@ -43,3 +123,43 @@ def make_filter(must_exclude, must_include):
         return must_exclude(path) and not must_include(path)
 
     return must_filter
+
+
+def _literal_prefix(pattern):
+    """Returns the part of the pattern before the first wildcard."""
+    for i, char in enumerate(pattern):
+        if char in WILDCARDS:
+            return pattern[:i]
+    return pattern
+
+
+def make_pruner(exclude_patterns, include_patterns):
+    """Returns a function that evaluates if the contents of a folder can be
+    skipped without listing them, because every path inside must be excluded
+    and none of the `include` patterns can match them.
+
+    Only the include patterns with a path separator (eg: `.github/*`) can
+    re-include something inside an excluded folder. The others match names and
+    do not prevent the folder from being pruned.
+    """
+    # A pattern ending with `*` that matches `folder/`, also matches
+    # anything inside that folder.
+    exclude_contents = PatternSet([
+        pattern for pattern in exclude_patterns if pattern.endswith("*")
+    ])
+    include_prefixes = [
+        _literal_prefix(os.path.normcase(_normalize_str(pattern)))
+        for pattern in include_patterns
+        if os.path.sep in pattern
+    ]
+
+    def must_prune(path):
+        path = os.path.normcase(_normalize_str(str(path))) + os.path.sep
+        if not exclude_contents.path_re or not exclude_contents.path_re.match(path):
+            return False
+        for prefix in include_prefixes:
+            if prefix.startswith(path) or path.startswith(prefix):
+                return False
+        return True
+
+    return must_prune
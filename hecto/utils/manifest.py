@@ -0,0 +1,158 @@
+from hashlib import sha1
+import json
+import os
+
+from .files import get_content_digest
+
+
+__all__ = ("Manifest", )
+
+MANIFEST_NAME = ".hecto-manifest.json"
+MANIFEST_VERSION = 2
+
+
+def _to_json(obj):
+    if isinstance(obj, (set, frozenset)):
+        return sorted(repr(value) for value in obj)
+    if callable(obj):
+        module = getattr(obj, "__module__", None) or ""
+        name = getattr(obj, "__qualname__", None) or type(obj).__qualname__
+        return f"{module}:{name}"
+    return repr(obj)
+
+
+def get_hash(value):
+    """Returns a stable hash of `value`. Functions are hashed by their names."""
+    dump = json.dumps(value, sort_keys=True, default=_to_json)
+    return sha1(dump.encode("utf8")).hexdigest()
+
+
+class Manifest(object):
+    """The record of the files rendered in a previous run, stored in
+    `.hecto-manifest.json` in the destination folder.
+
+    For each output file, it stores the fingerprint of its source and of the
+    templates it includes, the variables used by those templates and by the
+    path of the file, the hash of the values of those variables, and the
+    hash, size, and mtime of the output. A file is "fresh" if none of those
+    have changed, so it can be skipped without rendering or reading it.
+
+    Because only the variables used are hashed, when some values of the data
+    change only the files that use them are rendered again.
+    """
+
+    def __init__(self, dst_path, source, render, data, stat=None):
+        self.path = dst_path / MANIFEST_NAME
+        self.dst_path = dst_path
+        self.stat = stat or self.stat_file
+        self.source = source
+        self.render = render
+        self.data = data
+        self.data_hashes = {}
+        self.records = self.load()
+        self.new_records = {}
+
+    def load(self):
+        try:
+            manifest = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(manifest, dict):
+            return {}
+        if manifest.get("version") != MANIFEST_VERSION:
+            return {}
+        return manifest.get("files") or {}
+
+    def save(self):
+        """Writes the records of this run, replacing the previous ones."""
+        manifest = {"version": MANIFEST_VERSION, "files": self.new_records}
+        tmp_path = self.path.with_name(f"{MANIFEST_NAME}.{os.getpid()}")
+        tmp_path.write_text(json.dumps(manifest, indent=1, sort_keys=True))
+        os.replace(str(tmp_path), str(self.path))
+
+    def get_context_hash(self, context, variables):
+        if context is None:
+            return None  # Not a template
+        key = tuple(variables)
+        data_hash = self.data_hashes.get(key)
+        if data_hash is None:
+            data = self.data
+            data_hash = get_hash({name: data[name] for name in key if name in data})
+            self.data_hashes[key] = data_hash
+        if not context:
+            return data_hash
+        return get_hash([data_hash, context])
+
+    def get_fresh(self, rel_path, source_path, context):
+        """Returns the record of `rel_path` if the file doesn't need to be
+        rendered again, or `None`. `context` must be `None` if the file is
+        copied as-is.
+        """
+        record = self.records.get(str(rel_path))
+        if not record or record["deps"] is None:
+            return None
+        context_hash = self.get_context_hash(context, record["variables"])
+        if record["context"] != context_hash:
+            return None
+
+        try:
+            stat = self.stat(rel_path)
+        except OSError:
+            return None
+        if (stat.st_size, stat.st_mtime_ns) != (record["size"], record["mtime"]):
+            return None
+
+        if record["source"] != self.get_source_key(source_path, record["deps"]):
+            return None
+        return record
+
+    def get_digest(self, rel_path):
+        """Returns the recorded SHA1 of the rendered file at `rel_path`, if it
+        hasn't been modified since."""
+        record = self.records.get(str(rel_path))
+        if not record or not record["hash"]:
+            return None
+        try:
+            stat = self.stat(rel_path)
+        except OSError:
+            return None
+        if (stat.st_size, stat.st_mtime_ns) != (record["size"], record["mtime"]):
+            return None
+        return record["hash"]
+
+    def make_record(self, source_path, context, content):
+        """Returns the inputs of an output file, to be added after saving it."""
+        variables = self.render.get_variables(self.render.get_name(source_path))
+        deps = []
+        if context is not None:
+            deps, template_variables = self.render.get_dependencies(source_path)
+            variables.update(template_variables or [])
+        variables = sorted(variables)
+        if content is not None:
+            content = get_content_digest(content)
+        return {
+            "source": self.get_source_key(source_path, deps or []),
+            "deps": deps,
+            "variables": variables,
+            "context": self.get_context_hash(context, variables),
+            "hash": content,
+        }
+
+    def stat_file(self, rel_path):
+        return os.stat(str(self.dst_path / rel_path))
+
+    def get_source_key(self, source_path, deps):
+        source = self.source
+        keys = [source.fingerprint(source_path)]
+        for name in deps:
+            path = source.path.joinpath(*name.split("/"))
+            keys.append(source.fingerprint(path) if source.exists(path) else "")
+        if not deps:
+            return keys[0]
+        return sha1("|".join(keys).encode("utf8")).hexdigest()
+
+    def add(self, rel_path, record):
+        """Adds the record of a file already saved at `rel_path`."""
+        stat = self.stat(rel_path)
+        record = dict(record, size=stat.st_size, mtime=stat.st_mtime_ns)
+        self.new_records[str(rel_path)] = record
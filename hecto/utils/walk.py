@@ -0,0 +1,63 @@
+import os
+from pathlib import Path
+
+
+__all__ = ("Walker", )
+
+
+class Walker(object):
+    """Walks the project skeleton (a `Source` or the path of a folder)
+    yielding the folders that must be rendered, with their relative (and
+    rendered) destination path and their files.
+
+    The folders that can be pruned are removed from the walk before descending
+    into them, so their contents are never listed. The number of
+    pruned folders is available in `walker.pruned` after the walk.
+    """
+
+    def __init__(self, source, render, must_filter, must_prune=None):
+        if not hasattr(source, "walk"):
+            from ..sources import LocalSource
+            source = LocalSource(source)
+        self.source = source
+        self.src_path = str(source.path)
+        self.render = render
+        self.must_filter = must_filter
+        self.must_prune = must_prune
+        self.pruned = 0
+
+    def __iter__(self):
+        self.pruned = 0
+        rel_folders = {}
+
+        make_path = type(self.source.path)
+        for folder, dirnames, files in self.source.walk():
+            rel_folder = rel_folders.pop(folder, None)
+            if rel_folder is None:
+                rel_folder = self.get_rel_folder(folder)
+
+            if self.must_prune:
+                dirnames[:] = self.prune(folder, dirnames, rel_folders)
+
+            if self.must_filter(rel_folder):
+                continue
+
+            yield make_path(folder), Path(rel_folder), files
+
+    def get_rel_folder(self, folder):
+        rel_folder = folder.replace(self.src_path, "", 1).lstrip(os.path.sep)
+        rel_folder = self.render.render_name(rel_folder)
+        return rel_folder.replace("." + os.path.sep, ".", 1)
+
+    def prune(self, folder, dirnames, rel_folders):
+        make_path = type(self.source.path)
+        keep = []
+        for name in dirnames:
+            subfolder = str(make_path(folder, name))
+            rel_subfolder = self.get_rel_folder(subfolder)
+            if self.must_filter(rel_subfolder) and self.must_prune(rel_subfolder):
+                self.pruned += 1
+                continue
+            rel_folders[subfolder] = rel_subfolder
+            keep.append(name)
+        return keep
@@ -1,11 +1,14 @@
+from hashlib import sha1
 import os
 import re
+import tarfile
 import tempfile
 import shutil
 import subprocess
+import time
 
 
-__all__ = ("get_repo", "clone")
+__all__ = ("get_repo", "clone", "fetch", "MirrorCache", "make_mirror_cache")
 
 GIT_PREFIX = ("git@", "git://", "git+")
 GIT_POSTFIX = (".git",)
@@ -27,10 +30,280 @@ def get_repo(url):
     return url
 
 
-def clone(url):
+def _git(location, *args):
+    subprocess.check_call(["git", "-C", location] + list(args))
+
+
+def clone(url, ref=None, subdirectory=None):
+    """Clones the repository at `url` into a temporary folder and returns
+    its path.
+
+    Only the files of `ref` (a branch, tag, or commit; by default the
+    current HEAD of the remote) are downloaded, without the history.
+    If `subdirectory` is used, only that folder is checked out.
+    """
     location = tempfile.mkdtemp()
-    shutil.rmtree(location)  # Path must not exists
-    subprocess.check_call(["git", "clone", url, location])
+    try:
+        _git(location, "init", "-q")
+        _git(location, "remote", "add", "origin", url)
+        fetch = ["fetch", "-q", "--depth", "1"]
+        if subdirectory:
+            _git(location, "config", "core.sparseCheckout", "true")
+            sparse = os.path.join(location, ".git", "info", "sparse-checkout")
+            os.makedirs(os.path.dirname(sparse), exist_ok=True)
+            with open(sparse, "w") as f:
+                f.write("/" + subdirectory.strip("/") + "/\n")
+            fetch.append("--filter=blob:none")
+        _git(location, *fetch, "origin", ref or "HEAD")
+        _git(location, "checkout", "-q", "FETCH_HEAD")
+    except Exception:
+        shutil.rmtree(location, ignore_errors=True)
+        raise
+
     git_folder = os.path.join(location, ".git")
     shutil.rmtree(git_folder)
     return location
+
+
+def fetch(url, ref=None, subdirectory=None):
+    """Fetches the repository at `url` into a temporary bare repository,
+    without checking out any file, and returns its path.
+
+    Only the objects of `ref` (a branch, tag, or commit; by default the
+    current HEAD of the remote) are downloaded, and they are available
+    as `FETCH_HEAD`. If `subdirectory` is used, only the files of that folder
+    are downloaded (if the server supports partial clones). Any other file
+    is downloaded only if it's ever read.
+    """
+    location = tempfile.mkdtemp()
+    try:
+        _git(location, "init", "-q", "--bare")
+        if subdirectory:
+            _git(location, "remote", "add", "origin", url)
+            _git(
+                location,
+                "fetch",
+                "-q",
+                "--depth",
+                "1",
+                "--filter=blob:none",
+                "origin",
+                ref or "HEAD",
+            )
+            _fetch_blobs(location, "FETCH_HEAD:" + subdirectory.strip("/"))
+        else:
+            _git(location, "fetch", "-q", "--depth", "1", url, ref or "HEAD")
+    except Exception:
+        shutil.rmtree(location, ignore_errors=True)
+        raise
+    return location
+
+
+def _fetch_blobs(location, treeish):
+    """Downloads, all at once, the files of `treeish` that are missing in a
+    partial clone, instead of one by one when they are read."""
+    try:
+        listing = subprocess.check_output(
+            ["git", "-C", location, "ls-tree", "-r", "-z", treeish]
+        )
+    except subprocess.CalledProcessError:
+        return  # Eg: the subdirectory doesn't exist
+    blobs = []
+    for entry in listing.split(b"\0"):
+        info = entry.split(b"\t", 1)[0].split()
+        if len(info) == 3 and info[1] == b"blob":
+            blobs.append(info[2])
+    if not blobs:
+        return
+    subprocess.run(
+        [
+            "git", "-C", location, "-c", "fetch.negotiationAlgorithm=noop",
+            "fetch", "-q", "--no-tags", "--no-write-fetch-head",
+            "--filter=blob:none", "--stdin", "origin",
+        ],
+        input=b"\n".join(blobs) + b"\n",
+        check=True,
+    )
+
+
+DEFAULT_TTL = 60 * 60  # 1 hour
+DEFAULT_MAX_SIZE = 1024 * 1024 * 1024  # 1 GB
+
+FETCHED_STAMP = "hecto-fetched"
+USED_STAMP = "hecto-used"
+
+
+def _touch(path):
+    with open(path, "a"):
+        os.utime(path)
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0
+
+
+def _get_size(folder):
+    size = 0
+    for root, _, files in os.walk(folder):
+        for name in files:
+            try:
+                size += os.lstat(os.path.join(root, name)).st_size
+            except OSError:  # pragma: no cover
+                pass
+    return size
+
+
+class MirrorCache(object):
+    """A folder with bare mirrors of the repositories of the project templates,
+    so they don't have to be cloned each time.
+
+    A mirror is updated with a fetch only if the last one was more than `ttl`
+    seconds ago, or if the requested ref is not found. In `offline` mode, the
+    mirrors are never updated and only the repositories already in the cache
+    can be used.
+
+    When the total size of the cache is over `max_size` bytes, the least
+    recently used mirrors are deleted.
+    """
+
+    def __init__(
+        self, directory, ttl=DEFAULT_TTL, max_size=DEFAULT_MAX_SIZE, offline=False
+    ):
+        self.directory = str(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self.ttl = ttl
+        self.max_size = max_size
+        self.offline = offline
+
+    def get_mirror_path(self, url):
+        key = sha1(url.encode("utf8")).hexdigest()
+        return os.path.join(self.directory, key + ".git")
+
+    def get_mirror(self, url, update=False):
+        """Returns the path of an up-to-date mirror of the repository at `url`,
+        cloning it if it's not already in the cache."""
+        mirror = self.get_mirror_path(url)
+        if not os.path.exists(mirror):
+            if self.offline:
+                raise ValueError(f"The repository {url} is not in the cache")
+            self._make_mirror(url, mirror)
+            self.evict(keep=mirror)
+        elif update or time.time() - _mtime(self._stamp(mirror)) > self.ttl:
+            self.update(mirror)
+
+        _touch(os.path.join(mirror, USED_STAMP))
+        return mirror
+
+    def update(self, mirror):
+        if self.offline:
+            return
+        try:
+            subprocess.check_call(["git", "-C", mirror, "fetch", "-q", "--prune"])
+        except subprocess.CalledProcessError:
+            # Probably no network. Use what we already have.
+            return
+        _touch(self._stamp(mirror))
+
+    def resolve(self, url, ref=None):
+        """Returns the path of the mirror of the repository at `url` and the
+        commit of `ref` (by default, the HEAD of the repository)."""
+        mirror = self.get_mirror(url)
+        try:
+            return mirror, self._rev_parse(mirror, ref)
+        except subprocess.CalledProcessError:
+            if self.offline:
+                raise
+        # The ref might be newer than our last fetch
+        self.get_mirror(url, update=True)
+        return mirror, self._rev_parse(mirror, ref)
+
+    def clone(self, url, ref=None, subdirectory=None):
+        """Like `vcs.clone()` but the files are extracted from the mirror of
+        the repository."""
+        mirror, commit = self.resolve(url, ref)
+        return self._extract(mirror, commit, subdirectory)
+
+    def evict(self, keep=None):
+        """Deletes the least recently used mirrors until the size of the
+        cache is under `max_size`."""
+        if not self.max_size:
+            return
+        mirrors = []
+        total = 0
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if not name.endswith(".git") or path == keep:
+                continue
+            size = _get_size(path)
+            mirrors.append((_mtime(os.path.join(path, USED_STAMP)), size, path))
+            total += size
+        if keep:
+            total += _get_size(keep)
+
+        mirrors.sort()
+        for _, size, path in mirrors:
+            if total <= self.max_size:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def _rev_parse(self, mirror, ref):
+        rev = f"{ref or 'HEAD'}^{{commit}}"
+        return subprocess.check_output(
+            ["git", "-C", mirror, "rev-parse", "--verify", "-q", rev],
+            stderr=subprocess.DEVNULL,
+        ).decode("utf8").strip()
+
+    def _stamp(self, mirror):
+        return os.path.join(mirror, FETCHED_STAMP)
+
+    def _make_mirror(self, url, mirror):
+        # Clone to a temporary folder first, so a concurrent run
+        # never sees an incomplete mirror.
+        tmp = tempfile.mkdtemp(dir=self.directory, suffix=".tmp")
+        try:
+            subprocess.check_call(["git", "clone", "-q", "--mirror", url, tmp])
+            _touch(self._stamp(tmp))
+            os.rename(tmp, mirror)
+        except OSError:
+            if not os.path.exists(mirror):  # pragma: no cover
+                raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def _extract(self, mirror, commit, subdirectory):
+        location = tempfile.mkdtemp()
+        cmd = ["git", "-C", mirror, "archive", "--format=tar", commit]
+        if subdirectory:
+            cmd += ["--", subdirectory.strip("/")]
+        proc = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        error = None
+        try:
+            with tarfile.open(fileobj=proc.stdout, mode="r|") as tar:
+                kwargs = {"filter": "tar"} if hasattr(tarfile, "tar_filter") else {}
+                tar.extractall(location, **kwargs)
+        except tarfile.TarError as e:
+            error = e
+        finally:
+            proc.stdout.close()
+            retcode = proc.wait()
+
+        if retcode or error:
+            shutil.rmtree(location, ignore_errors=True)
+            if retcode:
+                raise subprocess.CalledProcessError(retcode, cmd)
+            raise error
+        return location
+
+
+def make_mirror_cache(cache):
+    """Returns a `MirrorCache` for `cache`, a folder path, unless
+    it already is one."""
+    if cache is None or isinstance(cache, MirrorCache):
+        return cache
+    return MirrorCache(cache)
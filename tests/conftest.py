@@ -6,6 +6,7 @@ import errno
 import filecmp
 import os
 import shutil
+import subprocess
 
 import hecto
 import pytest
@@ -34,7 +35,7 @@ def DATA():
 def render(PROJECT_TEMPLATE, DATA):
     def render(dst, **kwargs):
         kwargs.setdefault("quiet", True)
-        hecto.copy(PROJECT_TEMPLATE, dst, data=DATA, **kwargs)
+        return hecto.copy(PROJECT_TEMPLATE, dst, data=DATA, **kwargs)
     return render
 
 
@@ -83,3 +84,36 @@ def stdin():
     buffer = AppendableStringIO()
     with mock.patch("sys.stdin", buffer):
         yield buffer
+
+
+def git(cwd, *args):
+    subprocess.check_call(
+        ["git", "-c", "user.name=Hecto", "-c", "user.email=hecto@example.com"]
+        + list(args),
+        cwd=str(cwd),
+    )
+
+
+@pytest.fixture()
+def bare_repo(tmp_path):
+    """Return the `file://` URL of a local bare repository with two commits,
+    tagged `v1` and `v2`, of a project template inside a `template` folder.
+    """
+    work = tmp_path / "work"
+    (work / "template").mkdir(parents=True)
+    git(work, "init", "-q")
+    (work / "README.md").write_text("Not part of the template")
+    for version in ("v1", "v2"):
+        (work / "template" / "version.txt.tmpl").write_text(
+            version + " of [[ name ]]"
+        )
+        git(work, "add", ".")
+        git(work, "commit", "-q", "-m", version)
+        git(work, "tag", version)
+
+    bare = tmp_path / "bare.git"
+    git(tmp_path, "clone", "-q", "--bare", str(work), str(bare))
+    # Like GitHub, allow partial clones
+    git(bare, "config", "uploadpack.allowFilter", "true")
+    git(bare, "config", "uploadpack.allowAnySHA1InWant", "true")
+    return bare.as_uri()
@@ -0,0 +1,79 @@
+import json
+import re
+
+from hecto.cli import main, run_jobs
+
+
+def test_cli_copy(tmp_path, PROJECT_TEMPLATE):
+    data_file = tmp_path / "data.json"
+    data_file.write_text(json.dumps({"py3": True, "version": "1.0.0"}))
+    dst = tmp_path / "dst"
+    status = main([
+        "copy",
+        str(PROJECT_TEMPLATE),
+        str(dst),
+        "--data-file", str(data_file),
+        "-d", "myvar=awesome",
+        "-d", "project_name=Hecto",
+        "--exclude", "config.py*",
+        "--quiet",
+    ])
+    assert status == 0
+    assert 'name = "Hecto"' in (dst / "pyproject.toml").read_text()
+    assert (dst / "awesome.txt").exists()
+    assert not (dst / "config.py").exists()
+
+
+def test_cli_batch(tmp_path, PROJECT_TEMPLATE, capsys):
+    (tmp_path / "file").write_text("not a folder")
+    data = {"py3": True, "version": "1.0.0", "myvar": "awesome"}
+    options = {"exclude": ["config.py*"]}
+    jobs = [
+        {
+            "src": str(PROJECT_TEMPLATE),
+            "dst": str(tmp_path / name),
+            "data": dict(data, project_name=name),
+            "options": options,
+        }
+        for name in ("uno", "dos", "file")
+    ]
+    jobs_file = tmp_path / "jobs.jsonl"
+    jobs_file.write_text("\n".join(json.dumps(job) for job in jobs) + "\n")
+
+    status = main(["batch", str(jobs_file), "--workers", "2"])
+    out, err = capsys.readouterr()
+    assert status == 1
+    assert 'name = "uno"' in (tmp_path / "uno" / "pyproject.toml").read_text()
+    assert 'name = "dos"' in (tmp_path / "dos" / "pyproject.toml").read_text()
+    assert "file" in err
+    assert re.search(r"3 jobs \(1 failed\), 18 files, \d+ bytes written", out)
+    assert "jobs/s" in out and "files/s" in out
+
+    # The files that already exist are skipped, but the ".append" ones
+    jobs_file.write_text("\n".join(json.dumps(job) for job in jobs[:2]) + "\n")
+    assert main(["batch", str(jobs_file)]) == 0
+    out, err = capsys.readouterr()
+    assert "2 jobs (0 failed), 2 files, 8 bytes written" in out
+
+
+def test_cli_batch_does_not_prompt(tmp_path, PROJECT_TEMPLATE, monkeypatch):
+    job = {
+        "src": str(PROJECT_TEMPLATE),
+        "dst": str(tmp_path / "dst"),
+        "data": {"py3": True, "version": "1", "myvar": "a", "project_name": "x"},
+        "options": {"exclude": ["config.py*"]},
+    }
+    summary, = run_jobs([job])
+    assert summary.error is None
+
+    def prompt(*args, **kwargs):
+        raise AssertionError("Must not prompt")
+
+    monkeypatch.setattr("hecto.main.prompt_bool", prompt)
+    job["options"]["skip"] = False
+    summary, = run_jobs([job])
+    assert isinstance(summary.error, ValueError)
+
+
+def test_cli_without_command(capsys):
+    assert main([]) == 2
@@ -1,8 +1,13 @@
 from pathlib import Path
+from unittest import mock
 import filecmp
+import os
 import re
+import shutil
+import sys
 
 import hecto
+import jinja2
 import pytest
 
 
@@ -133,3 +138,157 @@ def test_invalid_quiet(dst, capsys):
     hecto.copy(dst, ".", quiet=True)
     out, err = capsys.readouterr()
     assert out == ""
+
+
+def make_secret():
+    return "secret"
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="Needs Python 3.7+")
+@pytest.mark.parametrize("stream", [False, True])
+def test_copy_processes(dst, tmp_path, PROJECT_TEMPLATE, DATA, stream):
+    data = dict(DATA, make_secret=make_secret)
+    hecto.copy(PROJECT_TEMPLATE, dst, data=data, quiet=True)
+    hecto.copy(
+        PROJECT_TEMPLATE, tmp_path, data=data, quiet=True, processes=2, stream=stream
+    )
+
+    for path in dst.glob("**/*"):
+        other = tmp_path / path.relative_to(dst)
+        if path.is_dir():
+            assert other.is_dir()
+        else:
+            assert filecmp.cmp(str(path), str(other), shallow=False)
+
+
+def test_copy_processes_needs_python_37(dst, PROJECT_TEMPLATE, DATA, monkeypatch):
+    monkeypatch.setattr(sys, "version_info", (3, 6, 9))
+    with pytest.raises(RuntimeError, match="Python 3.7"):
+        hecto.copy(PROJECT_TEMPLATE, dst, data=DATA, quiet=True, processes=2)
+
+
+def test_copy_stream(tmp_path, render):
+    render(tmp_path / "normal")
+    render(tmp_path / "stream", stream=True)
+    for path in (tmp_path / "normal").rglob("*"):
+        if path.is_file() and path.name != "config.py":
+            streamed = tmp_path / "stream" / path.relative_to(tmp_path / "normal")
+            assert streamed.read_bytes() == path.read_bytes()
+
+    render(tmp_path / "stream", stream=True, skip=True)
+    leftovers = [path for path in (tmp_path / "stream").rglob("*.tmp")]
+    assert not leftovers
+
+
+def test_copy_hardlinks(dst, render, PROJECT_TEMPLATE):
+    render(dst, copy_strategy="hardlink")
+    src = PROJECT_TEMPLATE / "doc" / "images" / "nslogo.gif"
+    assert os.path.samefile(str(src), str(dst / "doc" / "images" / "nslogo.gif"))
+    render(dst, copy_strategy="hardlink", skip=True)
+
+
+def test_trusted_option(tmp_path, DATA):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "type.txt.tmpl").write_text("[[ myvar.__class__.__name__ ]]")
+
+    hecto.copy(src, tmp_path / "trusted", data=DATA, quiet=True, trusted=True)
+    assert (tmp_path / "trusted" / "type.txt").read_text() == "str"
+
+    (src / "hecto.yaml").write_text("trusted: true\n")
+    hecto.copy(src, tmp_path / "config", data=DATA, quiet=True, trusted=None)
+    assert (tmp_path / "config" / "type.txt").read_text() == "str"
+
+    # The template can't disable the sandbox by itself
+    with pytest.raises(jinja2.exceptions.SecurityError):
+        hecto.copy(src, tmp_path / "sandbox", data=DATA, quiet=True)
+
+
+def test_trusted_config_of_remote_templates(tmp_path, DATA):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "type.txt.tmpl").write_text("[[ myvar.__class__.__name__ ]]")
+    (src / "hecto.yaml").write_text("trusted: true\n")
+    archive = shutil.make_archive(str(tmp_path / "template"), "zip", str(src))
+
+    with pytest.raises(jinja2.exceptions.SecurityError):
+        hecto.copy(archive, tmp_path / "dst", data=DATA, quiet=True, trusted=None)
+
+
+def test_copy_returns_a_summary(dst, PROJECT_TEMPLATE, DATA):
+    summary = hecto.copy(PROJECT_TEMPLATE, dst, data=DATA, quiet=True)
+    assert summary.dst_path == dst
+    assert summary.actions["created"] == 9
+    assert summary.size > 0
+    assert summary.error is None
+
+    summary = hecto.copy(PROJECT_TEMPLATE, dst, data=DATA, quiet=True, skip=True)
+    assert summary.actions["created"] == 0
+    assert summary.actions["extended"] == 1
+    appended = (PROJECT_TEMPLATE / "doc" / "foo.txt.append").read_bytes()
+    assert summary.size == len(appended)
+
+
+def test_copy_many(tmp_path, PROJECT_TEMPLATE, DATA):
+    (tmp_path / "file").write_text("not a folder")
+    jobs = [
+        (tmp_path / name, dict(DATA, project_name=name))
+        for name in ("uno", "dos", "tres", "file")
+    ]
+    list_ = hecto.sources.CachedSource._list
+    with mock.patch.object(
+        hecto.sources.CachedSource, "_list", autospec=True, side_effect=list_
+    ) as spy:
+        summaries = hecto.copy_many(PROJECT_TEMPLATE, jobs, workers=2)
+
+    listed = [call[0][1] for call in spy.call_args_list]
+    assert len(listed) == len(set(listed))
+    assert str(PROJECT_TEMPLATE) in listed
+    assert [summary.dst_path for summary in summaries] == [job[0] for job in jobs]
+    for summary in summaries[:3]:
+        assert summary.error is None
+        assert summary.actions["created"] == 9
+        name = summary.dst_path.name
+        content = (summary.dst_path / "pyproject.toml").read_text()
+        assert f'name = "{name}"' in content
+    assert summaries[-1].error
+
+
+def test_copy_many_existing_destinations(tmp_path, PROJECT_TEMPLATE, DATA):
+    jobs = [(tmp_path / name, DATA) for name in ("uno", "dos")]
+    hecto.copy_many(PROJECT_TEMPLATE, jobs, workers=2)
+    (tmp_path / "uno" / "pyproject.toml").write_text("changed")
+
+    with mock.patch("hecto.main.prompt_bool", side_effect=AssertionError) as prompt:
+        summaries = hecto.copy_many(PROJECT_TEMPLATE, jobs, workers=2)
+    assert not prompt.called
+    assert all(summary.error is None for summary in summaries)
+    assert summaries[0].actions["created"] == 0
+    assert (tmp_path / "uno" / "pyproject.toml").read_text() == "changed"
+
+    summaries = hecto.copy_many(PROJECT_TEMPLATE, jobs, workers=2, force=True)
+    assert (tmp_path / "uno" / "pyproject.toml").read_text() != "changed"
+
+    with pytest.raises(ValueError):
+        hecto.copy_many(PROJECT_TEMPLATE, jobs, skip=False)
+
+
+def test_copy_many_keeps_pruning(tmp_path, DATA):
+    src = tmp_path / "src"
+    (src / ".git" / "objects").mkdir(parents=True)
+    (src / ".git" / "objects" / "1234").write_text("")
+    (src / "app").mkdir()
+    (src / "app" / "main.py").write_text("")
+    jobs = [(tmp_path / name, DATA) for name in ("uno", "dos", "tres")]
+
+    list_ = hecto.sources.CachedSource._list
+    with mock.patch.object(
+        hecto.sources.CachedSource, "_list", autospec=True, side_effect=list_
+    ) as spy:
+        hecto.copy_many(src, jobs, workers=2)
+
+    listed = sorted(call[0][1] for call in spy.call_args_list)
+    assert listed == [str(src), str(src / "app")]
+    for dst_path, _ in jobs:
+        assert (dst_path / "app" / "main.py").exists()
+        assert not (dst_path / ".git").exists()
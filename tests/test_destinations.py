@@ -0,0 +1,186 @@
+from unittest import mock
+import io
+import os
+import tarfile
+import zipfile
+
+import hecto
+from hecto.destinations import DestinationIndex
+from hecto.destinations import MemoryDestination, TarDestination, ZipDestination
+from hecto.sources import MemorySource
+import pytest
+
+
+class Stream(object):
+    """A writable file object that can't seek."""
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    def write(self, data):
+        return self.buffer.write(data)
+
+    def flush(self):
+        pass
+
+
+def read_folder(folder):
+    return {
+        str(path.relative_to(folder)): path.read_bytes()
+        for path in folder.rglob("*") if path.is_file() and path.name != "config.py"
+    }
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_copy_to_tar(tmp_path, render, stream):
+    size = render(tmp_path / "folder").size
+    expected = read_folder(tmp_path / "folder")
+
+    output = Stream()
+    with TarDestination(output, prefix="project") as dst:
+        assert render(dst, stream=stream).size == size
+
+    output.buffer.seek(0)
+    with tarfile.open(fileobj=output.buffer, mode="r:gz") as tar:
+        tar.extractall(str(tmp_path / "tar"))
+    assert read_folder(tmp_path / "tar" / "project") == expected
+    assert (tmp_path / "tar" / "project" / "awesome").is_dir()
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_copy_to_zip(tmp_path, render, stream):
+    size = render(tmp_path / "folder").size
+    expected = read_folder(tmp_path / "folder")
+
+    output = Stream()
+    with ZipDestination(output) as dst:
+        assert render(dst, stream=stream).size == size
+
+    with zipfile.ZipFile(output.buffer) as zip_:
+        assert "awesome/" in zip_.namelist()
+        zip_.extractall(str(tmp_path / "zip"))
+    assert read_folder(tmp_path / "zip") == expected
+
+
+def test_copy_to_archive_modes(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "run.sh").write_text("echo [[ folder_name ]]")
+    (src / "run.sh").chmod(0o755)
+
+    output = io.BytesIO()
+    with TarDestination(output, mode="w", prefix="demo") as dst:
+        hecto.copy(src, dst, quiet=True, render_as=lambda src, dst: dst)
+    output.seek(0)
+    with tarfile.open(fileobj=output) as tar:
+        member = tar.getmember("demo/run.sh")
+        assert tar.extractfile(member).read() == b"echo demo"
+
+    output = io.BytesIO()
+    with ZipDestination(output) as dst:
+        hecto.copy(src, dst, quiet=True)
+    with zipfile.ZipFile(output) as zip_:
+        assert (zip_.getinfo("run.sh").external_attr >> 16) & 0o777 == 0o755
+
+
+def test_copy_to_archive_pretend(render):
+    output = io.BytesIO()
+    with ZipDestination(output) as dst:
+        render(dst, pretend=True)
+    with zipfile.ZipFile(output) as zip_:
+        assert zip_.namelist() == []
+
+
+def test_incremental_needs_a_folder(render):
+    with pytest.raises(ValueError):
+        render(ZipDestination(io.BytesIO()), incremental=True)
+
+
+def test_copy_in_memory():
+    src = MemorySource({
+        "README.md.tmpl": "# [[ name ]]\n[% include 'parts/footer.txt' %]",
+        "parts/footer.txt": "Made in [[ folder_name ]]",
+        "[[ name ]]/logo.png": b"\x89PNG\x00",
+    })
+    dst = MemoryDestination(name="demo")
+    hecto.copy(src, dst, data={"name": "hecto"}, quiet=True)
+
+    assert dst.files == {
+        "README.md": b"# hecto\nMade in demo",
+        "parts/footer.txt": b"Made in [[ folder_name ]]",
+        "hecto/logo.png": b"\x89PNG\x00",
+    }
+    assert dst.folders == {"parts", "hecto"}
+
+
+def test_copy_in_memory_existing_files():
+    src = MemorySource({"a.txt": "new", "b.txt": "same", "c.txt.append": "+"})
+    dst = MemoryDestination({"a.txt": "old", "b.txt": "same", "c.txt": "c"})
+    hecto.copy(src, dst, quiet=True, skip=True)
+    assert dst.files == {"a.txt": b"old", "b.txt": b"same", "c.txt": b"c+"}
+
+    hecto.copy(src, dst, quiet=True, force=True)
+    assert dst.files["a.txt"] == b"new"
+
+
+def test_destination_index(tmp_path, make_folder):
+    make_folder(tmp_path / "dst" / "doc")
+    (tmp_path / "dst" / "doc" / "foo.txt").write_text("foo")
+    index = DestinationIndex(tmp_path / "dst")
+
+    assert index.exists(".")
+    assert index.exists("doc")
+    assert index.exists("doc/foo.txt")
+    assert index.get_size("doc/foo.txt") == 3
+    assert not index.exists("doc/bar.txt")
+    assert not index.exists("nope/bar.txt")
+    assert index.get_size("doc/bar.txt") is None
+
+    make_folder(tmp_path / "dst" / "new" / "sub")
+    index.add_folder("new/sub")
+    (tmp_path / "dst" / "new" / "sub" / "bar.txt").write_text("bar")
+    (tmp_path / "dst" / "doc" / "foo.txt").write_text("foobar")
+    with mock.patch("os.scandir", side_effect=AssertionError):
+        index.update("new/sub/bar.txt")
+        index.update("doc/foo.txt")
+        assert index.exists("new/sub/bar.txt")
+        assert index.get_size("doc/foo.txt") == 6
+
+
+def test_copy_does_not_list_a_new_destination(tmp_path, render):
+    with mock.patch.object(DestinationIndex, "_scan", side_effect=AssertionError):
+        render(tmp_path / "dst")
+    assert (tmp_path / "dst" / "doc" / "images" / "nslogo.gif").exists()
+
+
+def test_copy_lists_each_folder_once(tmp_path, render):
+    render(tmp_path / "dst")
+    listed = []
+    scan = DestinationIndex._scan
+
+    def spy(index, folder):
+        listed.append(folder)
+        return scan(index, folder)
+
+    with mock.patch.object(DestinationIndex, "_scan", spy):
+        render(tmp_path / "dst", force=True)
+    assert listed
+    assert len(listed) == len(set(listed))
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_copy_stats_nothing_in_the_index(tmp_path, render, stream):
+    dst = tmp_path / "dst"
+    stated = []
+    stat = os.stat
+
+    def spy(path, *args, **kwargs):
+        if str(path).startswith(str(dst) + os.sep):
+            stated.append(path)
+        return stat(path, *args, **kwargs)
+
+    # `shutil.copy2()` checks the destination itself, hard links don't
+    with mock.patch("os.stat", spy):
+        render(dst, stream=stream, copy_strategy="hardlink")
+        render(dst, stream=stream, skip=True)
+    assert stated == []
@@ -0,0 +1,102 @@
+from hashlib import sha1
+from unittest import mock
+import os
+
+from hecto.utils import file_has_content, files_are_identical, StreamedFile
+from hecto.utils import get_copy_strategy
+from hecto.utils import files
+import pytest
+
+
+def test_files_are_identical(tmp_path):
+    one = tmp_path / "one"
+    two = tmp_path / "two"
+    one.write_bytes(b"x" * (files.CHUNK_SIZE + 1))
+    two.write_bytes(b"x" * (files.CHUNK_SIZE + 1))
+    assert files_are_identical(one, two)
+
+    two.write_bytes(b"x" * files.CHUNK_SIZE + b"y")
+    assert not files_are_identical(one, two)
+
+    two.write_bytes(b"x")
+    with mock.patch("builtins.open") as open_:
+        assert not files_are_identical(one, two)
+    assert not open_.called
+
+
+def test_file_has_content(tmp_path):
+    path = tmp_path / "file"
+    data = b"x" * (files.CHUNK_SIZE * 2)
+    path.write_bytes(data)
+    assert file_has_content(path, data)
+    assert not file_has_content(path, data[:-1] + b"y")
+    assert not file_has_content(tmp_path / "nope", data)
+
+    with mock.patch("builtins.open") as open_:
+        assert not file_has_content(path, b"short")
+        assert file_has_content(path, data, digest=sha1(data).hexdigest())
+        assert not file_has_content(path, data, digest="outdated")
+    assert not open_.called
+
+
+def test_streamed_file(tmp_path):
+    path = tmp_path / "file"
+    chunks = ["x" * 10] * 10
+    path.write_text("".join(chunks))
+    os.chmod(str(path), 0o755)
+
+    streamed = StreamedFile(iter(chunks), path)
+    assert streamed.identical
+    assert streamed.size == 100
+    streamed.discard()
+    assert os.listdir(str(tmp_path)) == ["file"]
+
+    streamed = StreamedFile(iter(chunks[:-1]), path)
+    assert not streamed.identical
+    assert path.read_text() == "".join(chunks)
+    streamed.save()
+    assert path.read_text() == "".join(chunks[:-1])
+    assert os.access(str(path), os.X_OK)
+    assert os.listdir(str(tmp_path)) == ["file"]
+
+
+def test_streamed_file_error(tmp_path):
+    def chunks():
+        yield "x"
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        StreamedFile(chunks(), tmp_path / "file")
+    assert os.listdir(str(tmp_path)) == []
+
+
+@pytest.mark.parametrize("strategy", ["copy", "fast", "reflink", "hardlink"])
+def test_copy_strategies(tmp_path, strategy):
+    src = tmp_path / "src.sh"
+    src.write_bytes(b"echo hello" * files.CHUNK_SIZE)
+    os.chmod(str(src), 0o755)
+    dst = tmp_path / "dst.sh"
+    dst.write_text("old")
+
+    copy_file = get_copy_strategy(strategy)
+    copy_file(src, dst)
+    assert dst.read_bytes() == src.read_bytes()
+    assert os.access(str(dst), os.X_OK)
+    assert os.path.samefile(str(src), str(dst)) == (strategy == "hardlink")
+    assert sorted(os.listdir(str(tmp_path))) == ["dst.sh", "src.sh"]
+
+
+def test_copy_strategy_fallback(tmp_path):
+    src = tmp_path / "src"
+    src.write_text("hello")
+    dst = tmp_path / "dst"
+    with mock.patch("os.link", side_effect=OSError):
+        get_copy_strategy("hardlink")(src, dst)
+    assert dst.read_text() == "hello"
+    assert not os.path.samefile(str(src), str(dst))
+
+
+def test_copy_strategy_unknown():
+    with pytest.raises(ValueError):
+        get_copy_strategy("teleport")
+    assert get_copy_strategy(print) is print
@@ -0,0 +1,95 @@
+from unittest import mock
+import json
+
+import hecto
+from hecto.utils import JinjaRender
+
+
+def make_template(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "hello.txt.tmpl").write_text("[% include 'name.inc' %] says [[ what ]]")
+    (src / "name.inc").write_text("[[ name ]]")
+    (src / "static.txt").write_text("static")
+    (src / "log.txt.append").write_text("line\n")
+    return src
+
+
+def copy(src, dst, data, **kwargs):
+    kwargs.setdefault("quiet", True)
+    hecto.copy(src, dst, data=data, exclude=["*.inc"], incremental=True, **kwargs)
+
+
+def spy_render():
+    return mock.patch.object(
+        JinjaRender, "__call__", autospec=True, side_effect=JinjaRender.__call__
+    )
+
+
+def test_incremental_skips_unchanged(tmp_path, dst):
+    src = make_template(tmp_path)
+    copy(src, dst, {"name": "hecto", "what": "hi"})
+    assert (dst / "hello.txt").read_text() == "hecto says hi"
+
+    manifest = json.loads((dst / ".hecto-manifest.json").read_text())
+    assert sorted(manifest["files"]) == ["hello.txt", "static.txt"]
+    assert manifest["files"]["hello.txt"]["deps"] == ["name.inc"]
+    assert manifest["files"]["hello.txt"]["variables"] == ["name", "what"]
+
+    with spy_render() as render, \
+            mock.patch("hecto.main.file_is_identical") as identical:
+        copy(src, dst, {"name": "hecto", "what": "hi"})
+    # Only the file to append is rendered again
+    rendered = [call[0][1].name for call in render.call_args_list]
+    assert rendered == ["log.txt.append"]
+    assert not identical.called
+    assert (dst / "log.txt").read_text() == "line\nline\n"
+
+
+def test_incremental_changed_inputs(tmp_path, dst):
+    src = make_template(tmp_path)
+    copy(src, dst, {"name": "hecto", "what": "hi"})
+
+    copy(src, dst, {"name": "hecto", "what": "bye"}, force=True)
+    assert (dst / "hello.txt").read_text() == "hecto says bye"
+
+    (src / "name.inc").write_text("[[ name | upper ]]")
+    copy(src, dst, {"name": "hecto", "what": "bye"}, force=True)
+    assert (dst / "hello.txt").read_text() == "HECTO says bye"
+
+
+def test_incremental_changed_destination(tmp_path, dst):
+    src = make_template(tmp_path)
+    copy(src, dst, {"name": "hecto", "what": "hi"})
+
+    (dst / "hello.txt").write_text("edited")
+    (dst / "static.txt").unlink()
+    copy(src, dst, {"name": "hecto", "what": "hi"}, force=True)
+    assert (dst / "hello.txt").read_text() == "hecto says hi"
+    assert (dst / "static.txt").read_text() == "static"
+
+
+def test_incremental_pretend(tmp_path, dst):
+    src = make_template(tmp_path)
+    copy(src, dst, {"name": "hecto", "what": "hi"}, pretend=True)
+    assert not (dst / ".hecto-manifest.json").exists()
+
+
+def test_incremental_changed_variable(tmp_path, dst):
+    src = make_template(tmp_path)
+    (src / "[[ folder ]]").mkdir()
+    (src / "[[ folder ]]" / "other.txt.tmpl").write_text("[[ other ]]")
+    data = {"name": "hecto", "what": "hi", "folder": "a", "other": "1"}
+    copy(src, dst, data)
+
+    with spy_render() as render:
+        copy(src, dst, dict(data, what="bye"), force=True)
+    rendered = sorted(call[0][1].name for call in render.call_args_list)
+    assert rendered == ["hello.txt.tmpl", "log.txt.append"]
+    assert (dst / "hello.txt").read_text() == "hecto says bye"
+
+    with spy_render() as render:
+        copy(src, dst, dict(data, what="bye", folder="b"), force=True)
+    rendered = sorted(call[0][1].name for call in render.call_args_list)
+    assert rendered == ["log.txt.append", "other.txt.tmpl"]
+    assert (dst / "b" / "other.txt").read_text() == "1"
@@ -0,0 +1,68 @@
+from fnmatch import fnmatch
+import os
+import unicodedata
+
+from hecto.utils import make_filter, make_matcher, PathMatcher
+
+
+PATTERNS = [
+    "~*", "~*/*", ".*", ".*/*", "__pycache__", "__pycache__/*",
+    "*.py[co]", "doc/*", "mañana.txt", "build", "a?c.txt", "[[ myvar ]]",
+]
+
+PATHS = [
+    "~foo", "foo/~bar", ".git", ".git/HEAD", "src/__pycache__",
+    "src/__pycache__/app.pyc", "app.pyc", "app.py", "doc", "doc/images/logo.gif",
+    "mañana.txt", unicodedata.normalize("NFD", "doc/mañana.txt"), "build",
+    "src/build", "abc.txt", "src/abc.txtx", "[[ myvar ]]", "m", "README.md",
+]
+
+
+def reference_match(path, patterns):
+    path = unicodedata.normalize("NFD", path)
+    name = os.path.basename(path)
+    for pattern in patterns:
+        pattern = unicodedata.normalize("NFD", pattern)
+        if fnmatch(name, pattern) or fnmatch(path, pattern):
+            return True
+    return False
+
+
+def test_make_matcher_results():
+    match = make_matcher(PATTERNS)
+    for path in PATHS:
+        assert match(path) == reference_match(path, PATTERNS), path
+
+
+def test_make_matcher_no_patterns():
+    match = make_matcher([])
+    assert not match("foo.txt")
+
+
+def test_path_matcher():
+    matcher = PathMatcher(
+        exclude=[".*", "*.txt"],
+        include=[".gitignore"],
+        skip_if_exists=["*.txt"],
+    )
+
+    match = matcher(".gitignore")
+    assert match.exclude and match.include and not match.skip_if_exists
+    assert not match.filtered
+
+    match = matcher("doc/readme.txt")
+    assert match.exclude and not match.include and match.skip_if_exists
+    assert match.filtered
+
+    assert matcher("app.py") == (False, False, False)
+
+
+def test_path_matcher_same_as_filter():
+    exclude = PATTERNS
+    include = [".gitignore", "doc/images/*"]
+    must_filter = make_filter(make_matcher(exclude), make_matcher(include))
+    matcher = PathMatcher(exclude=exclude, include=include)
+
+    for path in PATHS + [".gitignore", "doc/images/logo.gif"]:
+        assert matcher.must_filter(path) == must_filter(path), path
+        assert matcher(path).filtered == must_filter(path), path
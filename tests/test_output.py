@@ -47,3 +47,32 @@ def test_output_quiet(capsys, dst, render):
     render(dst, quiet=True)
     out, err = capsys.readouterr()
     assert out == ""
+
+
+def test_output_workers(capsys, dst, tmp_path, render):
+    render(dst, quiet=False)
+    serial, _ = capsys.readouterr()
+    render(dst, quiet=False, force=True)
+    serial_update, _ = capsys.readouterr()
+
+    render(tmp_path, quiet=False, workers=4)
+    parallel, _ = capsys.readouterr()
+    render(tmp_path, quiet=False, force=True, workers=4)
+    parallel_update, _ = capsys.readouterr()
+
+    assert parallel == serial
+    assert parallel_update == serial_update
+
+
+def test_output_workers_conflict(capsys, stdin, dst, render):
+    render(dst)
+    path = dst / "pyproject.toml"
+    path.write_text("lorem ipsum")
+    stdin.append("n\n")  # config.py has a random secret
+    stdin.append("n\n")
+    render(dst, quiet=False, workers=4)
+    out, _ = capsys.readouterr()
+
+    assert re.search(r"conflict[^\s]*  pyproject\.toml", out)
+    assert re.search(r"skipped[^\s]*  pyproject\.toml", out)
+    assert path.read_text() == "lorem ipsum"
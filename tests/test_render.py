@@ -0,0 +1,113 @@
+from unittest import mock
+import os.path
+
+from jinja2.exceptions import SecurityError
+import pytest
+
+from hecto.utils import BytecodeCache, JinjaRender
+from hecto.utils.jinja_render import get_import_path, import_string
+
+
+def test_import_path():
+    path = get_import_path(os.path.basename)
+    assert path.endswith(":basename")
+    assert import_string(path) is os.path.basename
+    assert get_import_path("os.path:join") == "os.path:join"
+
+
+def test_import_path_of_a_lambda():
+    with pytest.raises(ValueError):
+        get_import_path(lambda x: x)
+
+
+def make_render(src, cache, **envops):
+    envops.setdefault("variable_start_string", "[[")
+    envops.setdefault("variable_end_string", "]]")
+    envops["bytecode_cache"] = cache
+    return JinjaRender(src, {"name": "world"}, envops=envops)
+
+
+def test_bytecode_cache(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "hello.txt.tmpl").write_text("Hello [[ name ]]")
+    cache = BytecodeCache(tmp_path / "cache")
+
+    render = make_render(src, cache)
+    assert render(src / "hello.txt.tmpl") == "Hello world"
+    assert len(list((tmp_path / "cache").iterdir())) == 1
+
+    render = make_render(src, cache)
+    with mock.patch.object(render.env, "compile", side_effect=AssertionError):
+        assert render(src / "hello.txt.tmpl") == "Hello world"
+
+
+def test_bytecode_cache_changes(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    path = src / "hello.txt.tmpl"
+    path.write_text("Hello [[ name ]]")
+    cache = BytecodeCache(tmp_path / "cache")
+    make_render(src, cache)(path)
+
+    render = make_render(src, cache, variable_start_string="<<")
+    assert render(path) == "Hello [[ name ]]"
+    assert len(list((tmp_path / "cache").iterdir())) == 2
+
+    path.write_text("Bye [[ name ]]")
+    assert make_render(src, cache)(path) == "Bye world"
+
+
+def test_bytecode_cache_eviction(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    for i in range(5):
+        (src / f"{i}.tmpl").write_text(f"{i} [[ name ]]" * 100)
+    cache = BytecodeCache(tmp_path / "cache", max_size=1)
+
+    render = make_render(src, cache)
+    for i in range(5):
+        render(src / f"{i}.tmpl")
+    assert len(list((tmp_path / "cache").iterdir())) <= 1
+
+
+def test_copy_bytecode_cache(dst, tmp_path, render):
+    render(dst, bytecode_cache=tmp_path)
+    assert len(list(tmp_path.iterdir())) == 3  # .tmpl and .append files
+
+
+def test_render_name(tmp_path):
+    render = JinjaRender(tmp_path, {"name": "world"})
+    with mock.patch.object(render.env, "compile", side_effect=AssertionError):
+        assert render.render_name("hello.txt") == "hello.txt"
+        assert render.render_name("[[ name ]].txt") == "[[ name ]].txt"
+
+    assert render.render_name("{{ name }}.txt") == "world.txt"
+    with mock.patch.object(render.env, "compile", side_effect=AssertionError):
+        assert render.render_name("{{ name }}.txt") == "world.txt"
+
+
+def test_render_name_shares_the_compiled_names(tmp_path):
+    cache = {}
+    render = JinjaRender(tmp_path, {"name": "uno"}, name_cache=cache)
+    assert render.render_name("{{ name }}.txt") == "uno.txt"
+
+    render = JinjaRender(tmp_path, {"name": "dos"}, name_cache=cache)
+    with mock.patch.object(render.env, "compile", side_effect=AssertionError):
+        assert render.render_name("{{ name }}.txt") == "dos.txt"
+
+
+def test_render_filters(tmp_path):
+    (tmp_path / "hello.txt").write_text("Hello {{ name|shout }}")
+    render = JinjaRender(tmp_path, {"name": "world"}, filters={"shout": str.upper})
+    assert render(tmp_path / "hello.txt") == "Hello WORLD"
+
+
+def test_trusted_render(tmp_path):
+    (tmp_path / "hello.txt").write_text("{{ name.__class__.__name__ }}")
+    render = JinjaRender(tmp_path, {"name": "world"}, trusted=True)
+    assert render(tmp_path / "hello.txt") == "str"
+
+    render = JinjaRender(tmp_path, {"name": "world"})
+    with pytest.raises(SecurityError):
+        render(tmp_path / "hello.txt")
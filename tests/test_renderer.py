@@ -0,0 +1,129 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import hecto
+import jinja2
+import pytest
+
+
+def test_renderer(tmp_path, PROJECT_TEMPLATE, DATA):
+    renderer = hecto.Renderer(PROJECT_TEMPLATE)
+    for name in ("uno", "dos"):
+        renderer.copy(tmp_path / name, dict(DATA, myvar=name), quiet=True)
+
+    assert (tmp_path / "uno" / "uno.txt").exists()
+    assert (tmp_path / "uno" / "uno" / "hello.txt").exists()
+    assert (tmp_path / "dos" / "dos.txt").exists()
+    assert not (tmp_path / "dos" / "uno.txt").exists()
+
+
+def test_renderer_compiles_once(tmp_path, PROJECT_TEMPLATE, DATA):
+    renderer = hecto.Renderer(PROJECT_TEMPLATE)
+    renderer.copy(tmp_path / "uno", DATA, quiet=True)
+
+    compile = jinja2.Environment.compile
+    compiled = []
+
+    def spy(env, source, name=None, *args, **kwargs):
+        compiled.append(name)
+        return compile(env, source, name, *args, **kwargs)
+
+    with mock.patch("jinja2.Environment.compile", spy):
+        renderer.copy(tmp_path / "dos", dict(DATA, project_name="Dos"), quiet=True)
+
+    # Not even the names of files and folders
+    assert not compiled
+    assert 'name = "Dos"' in (tmp_path / "dos" / "pyproject.toml").read_text()
+
+
+def test_renderer_threads(tmp_path, PROJECT_TEMPLATE, DATA):
+    renderer = hecto.Renderer(PROJECT_TEMPLATE)
+    names = [f"project{i}" for i in range(8)]
+
+    def copy(name):
+        renderer.copy(tmp_path / name, dict(DATA, project_name=name), quiet=True)
+
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(copy, names))
+
+    for name in names:
+        content = (tmp_path / name / "pyproject.toml").read_text()
+        assert f'name = "{name}"' in content
+
+
+def test_renderer_not_found():
+    with pytest.raises(ValueError):
+        hecto.Renderer("foobar")
+
+
+def test_renderer_steps(PROJECT_TEMPLATE, DATA):
+    renderer = hecto.Renderer(PROJECT_TEMPLATE)
+    steps = renderer.iter_steps(DATA)
+    first = next(steps)
+    assert first.action == "folder"
+    assert str(first.rel_path) == "."
+
+    steps = {str(step.rel_path): step for step in steps}
+    assert steps["awesome"].action == "folder"
+    assert steps["awesome/hello.txt"].action == "copy"
+    assert steps["pyproject.toml"].action == "render"
+    assert str(steps["pyproject.toml"].walked_path) == "pyproject.toml.tmpl"
+    assert steps["doc/foo.txt"].action == "render"
+    assert ".svn" not in steps
+
+
+def test_renderer_execute_is_lazy(tmp_path, PROJECT_TEMPLATE, DATA):
+    renderer = hecto.Renderer(PROJECT_TEMPLATE)
+    render = renderer.make_render(DATA)
+    flags = {"pretend": False, "force": False, "skip": False, "stream": False}
+    destination = hecto.destinations.make_destination(tmp_path)
+
+    def steps():
+        for step in renderer.iter_steps(render=render):
+            yield step
+            if step.action == "render":
+                # Rendered before walking the rest of the project
+                assert (tmp_path / step.rel_path).exists()
+                return
+
+    results = list(renderer.execute(steps(), destination, render, flags))
+    assert results[-1].action == "created"
+
+
+def test_renderer_plan(tmp_path, PROJECT_TEMPLATE, DATA):
+    renderer = hecto.Renderer(PROJECT_TEMPLATE)
+    with mock.patch("hecto.utils.JinjaRender.__call__", side_effect=AssertionError):
+        plan = renderer.plan(tmp_path / "dst", DATA)
+    assert not (tmp_path / "dst").exists()
+
+    entries = {entry.rel_path: entry for entry in plan}
+    assert all(entry.action == "create" for entry in plan)
+    assert entries["pyproject.toml"] == hecto.PlanEntry(
+        "create", "pyproject.toml.tmpl", "pyproject.toml", True
+    )
+    assert entries["awesome/hello.txt"].source_path == "[[ myvar ]]/hello.txt"
+    assert not entries["awesome/hello.txt"].templated
+    assert hecto.plan_from_json(hecto.plan_to_json(plan)) == plan
+
+
+def test_renderer_plan_existing(tmp_path, PROJECT_TEMPLATE, DATA):
+    renderer = hecto.Renderer(PROJECT_TEMPLATE, skip_if_exists=["aaaa.txt"])
+    renderer.copy(tmp_path, DATA, quiet=True)
+    (tmp_path / "pyproject.toml").write_text("changed")
+
+    entries = {entry.rel_path: entry.action for entry in renderer.plan(tmp_path, DATA)}
+    assert entries["."] == "skip"
+    assert entries["doc/foo.txt"] == "append"
+    assert entries["aaaa.txt"] == "skip"
+    assert entries["pyproject.toml"] == "update"
+    assert entries["awesome/hello.txt"] == "update"
+
+    plan = renderer.plan(tmp_path, DATA, exact=True)
+    entries = {entry.rel_path: entry.action for entry in plan}
+    assert entries["pyproject.toml"] == "update"
+    assert entries["awesome/hello.txt"] == "identical"
+
+    entries = {entry.rel_path: entry.action for entry in renderer.plan(
+        tmp_path, DATA, skip=True
+    )}
+    assert entries["pyproject.toml"] == "skip"
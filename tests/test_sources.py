@@ -0,0 +1,228 @@
+from pathlib import PurePosixPath
+from unittest import mock
+import os
+import pickle
+import shutil
+import sys
+import tarfile
+
+import hecto
+from hecto import vcs
+from hecto.sources import ArchiveSource, GitSource, is_archive, LocalSource
+from hecto.sources import MemorySource, PackageSource
+import pytest
+
+from . import conftest
+
+
+def test_local_source_not_found():
+    with pytest.raises(ValueError):
+        LocalSource("foobar")
+
+    with pytest.raises(ValueError):
+        LocalSource(__file__)
+
+
+def test_git_source(bare_repo):
+    repo = vcs.fetch(bare_repo, "v1")
+    try:
+        with GitSource(repo, "FETCH_HEAD") as source:
+            walk = [(folder, dirs, files) for folder, dirs, files in source.walk()]
+            assert walk == [
+                ("/", ["template"], ["README.md"]),
+                ("/template", [], ["version.txt.tmpl"]),
+            ]
+            path = source.path / "template" / "version.txt.tmpl"
+            assert source.exists(path)
+            assert source.read_text(path) == "v1 of [[ name ]]"
+            assert not source.exists(source.path / "nope.txt")
+    finally:
+        shutil.rmtree(repo)
+
+
+def test_git_source_subdirectory(bare_repo, tmp_path):
+    with GitSource(tmp_path / "bare.git", "v2", subdirectory="template") as source:
+        assert list(source.walk()) == [("/", [], ["version.txt.tmpl"])]
+        assert source.read_text(PurePosixPath("/version.txt.tmpl")).startswith("v2")
+
+
+def test_git_source_modes_and_links(tmp_path, dst):
+    work = tmp_path / "work"
+    work.mkdir()
+    conftest.git(work, "init", "-q")
+    (work / "run.sh").write_text("echo hello")
+    (work / "run.sh").chmod(0o755)
+    os.symlink("run.sh", str(work / "link.sh"))
+    os.symlink("/etc", str(work / "outside"))
+    conftest.git(work, "add", ".")
+    conftest.git(work, "commit", "-q", "-m", "1")
+
+    hecto.copy(work.as_uri() + "/.git", dst, quiet=True)
+    assert (dst / "run.sh").read_text() == "echo hello"
+    assert os.access(str(dst / "run.sh"), os.X_OK)
+    assert (dst / "link.sh").read_text() == "echo hello"
+    assert not (dst / "outside").exists()
+
+
+def test_copy_from_git_objects(bare_repo, dst, monkeypatch):
+    def no_checkout(*args, **kwargs):
+        raise AssertionError("Must not make a checkout")
+
+    monkeypatch.setattr(vcs, "clone", no_checkout)
+    hecto.copy(bare_repo, dst, data={"name": "hecto"}, quiet=True)
+    assert (dst / "template" / "version.txt").read_text() == "v2 of hecto"
+    assert (dst / "README.md").exists()
+
+
+def test_copy_local_deletes_the_fetched_repo(bare_repo, dst, monkeypatch):
+    fetched = []
+    fetch = vcs.fetch
+
+    def spy(*args, **kwargs):
+        fetched.append(fetch(*args, **kwargs))
+        return fetched[-1]
+
+    monkeypatch.setattr(vcs, "fetch", spy)
+    hecto.copy_local(bare_repo, dst, data={"name": "hecto"}, quiet=True)
+    assert (dst / "template" / "version.txt").read_text() == "v2 of hecto"
+    assert fetched and not os.path.exists(fetched[0])
+
+
+@pytest.mark.parametrize("format", ["zip", "tar", "gztar"])
+def test_copy_from_archive(tmp_path, PROJECT_TEMPLATE, DATA, format):
+    archive = shutil.make_archive(
+        str(tmp_path / "template"), format, root_dir=str(PROJECT_TEMPLATE)
+    )
+    assert is_archive(archive)
+    hecto.copy(PROJECT_TEMPLATE, tmp_path / "folder", data=DATA, quiet=True)
+    hecto.copy(archive, tmp_path / "archive", data=DATA, quiet=True)
+
+    expected = tmp_path / "folder"
+    for path in expected.rglob("*"):
+        other = tmp_path / "archive" / path.relative_to(expected)
+        if path.is_dir():
+            assert other.is_dir()
+        elif path.name != "config.py":
+            assert other.read_bytes() == path.read_bytes()
+
+    # Everything is identical the second time
+    hecto.copy(archive, tmp_path / "archive", data=DATA, quiet=True, skip=True)
+
+
+def test_archive_source(tmp_path):
+    work = tmp_path / "work"
+    (work / "project" / "bin").mkdir(parents=True)
+    (work / "project" / "bin" / "run.sh").write_text("echo hello")
+    (work / "project" / "bin" / "run.sh").chmod(0o755)
+    os.symlink("bin/run.sh", str(work / "project" / "link.sh"))
+    os.symlink("/etc/hostname", str(work / "project" / "outside"))
+    archive = tmp_path / "template.tar"
+    with tarfile.open(str(archive), "w") as tar:
+        tar.add(str(work / "project"), arcname="project")
+
+    with ArchiveSource(archive, subdirectory="project") as source:
+        assert list(source.walk()) == [
+            ("/", ["bin"], ["link.sh"]),
+            ("/bin", [], ["run.sh"]),
+        ]
+        path = source.path / "link.sh"
+        assert source.read_text(path) == "echo hello"
+        source.copy_file(path, tmp_path / "copied.sh")
+        assert os.access(str(tmp_path / "copied.sh"), os.X_OK)
+        assert source.is_identical(path, tmp_path / "copied.sh")
+
+    with pytest.raises(ValueError):
+        ArchiveSource(archive, subdirectory="nope")
+
+
+def test_listed_sources_can_be_pickled(tmp_path, bare_repo, PROJECT_TEMPLATE):
+    archive = shutil.make_archive(
+        str(tmp_path / "template"), "tar", root_dir=str(PROJECT_TEMPLATE)
+    )
+    sources = [
+        (ArchiveSource(archive), "doc/mañana.txt"),
+        (GitSource(tmp_path / "bare.git", "v2"), "README.md"),
+        (MemorySource({"a/b.txt": "b"}), "a/b.txt"),
+    ]
+    for source, name in sources:
+        path = source.path / name
+        data = source.read_bytes(path)  # Opens the archive or git process
+        copy = pickle.loads(pickle.dumps(source))
+        assert list(copy.walk()) == list(source.walk())
+        assert copy.read_bytes(path) == data
+        copy.close()
+        source.close()
+
+
+def test_memory_source():
+    source = MemorySource({"a/b/c.txt": "c", "/a/d.txt": b"d", "e.txt": ""})
+    assert list(source.walk()) == [
+        ("/", ["a"], ["e.txt"]),
+        ("/a", ["b"], ["d.txt"]),
+        ("/a/b", [], ["c.txt"]),
+    ]
+    assert source.read_bytes(source.path / "a" / "d.txt") == b"d"
+    assert not source.exists(source.path / "a" / "b")
+    loader = source.get_loader()
+    assert loader.get_source(None, "a/b/c.txt")[0] == "c"
+
+
+@pytest.fixture()
+def zipped_package(tmp_path, monkeypatch):
+    folder = tmp_path / "hecto_demo_pkg" / "templates" / "app"
+    (folder / "sub").mkdir(parents=True)
+    (tmp_path / "hecto_demo_pkg" / "__init__.py").write_text("")
+    (folder / "hello.txt.tmpl").write_text("[[ name ]] [% include 'sub/b.txt' %]")
+    (folder / "sub" / "b.txt").write_text("bee")
+    archive = shutil.make_archive(
+        str(tmp_path / "package"), "zip", root_dir=str(tmp_path),
+        base_dir="hecto_demo_pkg",
+    )
+    monkeypatch.syspath_prepend(archive)
+    yield "hecto_demo_pkg"
+    sys.modules.pop("hecto_demo_pkg", None)
+
+
+def test_package_source(zipped_package, dst):
+    hecto.copy(f"pkg://{zipped_package}/templates/app", dst, data={"name": "x"},
+               quiet=True)
+    assert (dst / "hello.txt").read_text() == "x bee"
+    assert (dst / "sub" / "b.txt").read_text() == "bee"
+
+    with mock.patch("hecto.sources.package._list") as list_:
+        source = PackageSource(f"pkg://{zipped_package}/templates", "app")
+        assert list(source.walk()) == [("/", ["sub"], ["hello.txt.tmpl"]),
+                                       ("/sub", [], ["b.txt"])]
+        loader = source.get_loader()
+        assert loader.get_source(None, "sub/b.txt")[0] == "bee"
+    assert not list_.called
+
+    with pytest.raises(ValueError):
+        PackageSource(f"pkg://{zipped_package}/nope")
+    with pytest.raises(ValueError):
+        PackageSource("pkg://hecto_not_a_package/templates")
+
+
+def test_package_source_without_resources_files(tmp_path, dst, monkeypatch):
+    from importlib import resources
+
+    folder = tmp_path / "hecto_folder_pkg" / "templates"
+    folder.mkdir(parents=True)
+    (tmp_path / "hecto_folder_pkg" / "__init__.py").write_text("")
+    (folder / "hello.txt.tmpl").write_text("hello [[ name ]]")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delattr(resources, "files", raising=False)
+    try:
+        hecto.copy("pkg://hecto_folder_pkg/templates", dst, data={"name": "x"},
+                   quiet=True)
+    finally:
+        sys.modules.pop("hecto_folder_pkg", None)
+    assert (dst / "hello.txt").read_text() == "hello x"
+
+
+def test_zipped_package_source_without_resources_files(zipped_package, monkeypatch):
+    from importlib import resources
+
+    monkeypatch.delattr(resources, "files", raising=False)
+    with pytest.raises(ValueError, match="Python 3.9"):
+        PackageSource(f"pkg://{zipped_package}/templates")
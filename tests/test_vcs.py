@@ -1,7 +1,13 @@
 from os.path import exists, join
 import shutil
+import subprocess
 
+import hecto
+import pytest
 from hecto import vcs
+from hecto.sources import GitSource
+
+from . import conftest
 
 
 def test_get_repo():
@@ -28,3 +34,104 @@ def test_clone():
     assert tmp
     assert exists(join(tmp, "setup.py"))
     shutil.rmtree(tmp)
+
+
+def test_clone_shallow(bare_repo):
+    tmp = vcs.clone(bare_repo)
+    assert not exists(join(tmp, ".git"))
+    with open(join(tmp, "template", "version.txt.tmpl")) as f:
+        assert f.read().startswith("v2")
+    shutil.rmtree(tmp)
+
+
+def test_clone_ref(bare_repo):
+    tmp = vcs.clone(bare_repo, ref="v1")
+    with open(join(tmp, "template", "version.txt.tmpl")) as f:
+        assert f.read().startswith("v1")
+    shutil.rmtree(tmp)
+
+
+def test_clone_subdirectory(bare_repo):
+    tmp = vcs.clone(bare_repo, ref="v1", subdirectory="template")
+    assert exists(join(tmp, "template", "version.txt.tmpl"))
+    assert not exists(join(tmp, "README.md"))
+    shutil.rmtree(tmp)
+
+
+def test_copy_ref(bare_repo, dst):
+    hecto.copy(
+        bare_repo,
+        dst,
+        data={"name": "hecto"},
+        vcs_ref="v1",
+        subdirectory="template",
+        quiet=True,
+    )
+    assert (dst / "version.txt").read_text() == "v1 of hecto"
+    assert not (dst / "README.md").exists()
+
+
+def test_mirror_cache(bare_repo, tmp_path):
+    cache = vcs.MirrorCache(tmp_path / "cache")
+    tmp = cache.clone(bare_repo, ref="v1", subdirectory="template")
+    with open(join(tmp, "template", "version.txt.tmpl")) as f:
+        assert f.read().startswith("v1")
+    assert not exists(join(tmp, "README.md"))
+    shutil.rmtree(tmp)
+
+    # Warm runs don't need the remote
+    shutil.rmtree(str(tmp_path / "bare.git"))
+    tmp = cache.clone(bare_repo)
+    with open(join(tmp, "template", "version.txt.tmpl")) as f:
+        assert f.read().startswith("v2")
+    shutil.rmtree(tmp)
+
+
+def test_mirror_cache_fetch_missing_ref(bare_repo, tmp_path):
+    cache = vcs.MirrorCache(tmp_path / "cache")
+    shutil.rmtree(cache.clone(bare_repo))
+
+    conftest.git(tmp_path / "work", "tag", "v3")
+    conftest.git(tmp_path / "work", "push", "-q", str(tmp_path / "bare.git"), "v3")
+    tmp = cache.clone(bare_repo, ref="v3")
+    assert exists(join(tmp, "template", "version.txt.tmpl"))
+    shutil.rmtree(tmp)
+
+
+def test_mirror_cache_offline(bare_repo, tmp_path):
+    cache = vcs.MirrorCache(tmp_path / "cache", offline=True)
+    with pytest.raises(ValueError):
+        cache.clone(bare_repo)
+
+
+def test_mirror_cache_eviction(bare_repo, tmp_path):
+    other = tmp_path / "other.git"
+    conftest.git(tmp_path, "clone", "-q", "--bare", str(tmp_path / "work"), str(other))
+    cache = vcs.MirrorCache(tmp_path / "cache", max_size=1)
+
+    shutil.rmtree(cache.clone(bare_repo))
+    shutil.rmtree(cache.clone(other.as_uri()))
+    assert not exists(cache.get_mirror_path(bare_repo))
+    assert exists(cache.get_mirror_path(other.as_uri()))
+
+
+def test_copy_vcs_cache(bare_repo, tmp_path, dst):
+    kwargs = {"data": {"name": "hecto"}, "vcs_cache": tmp_path / "cache"}
+    hecto.copy(bare_repo, dst / "uno", subdirectory="template", quiet=True, **kwargs)
+    shutil.rmtree(str(tmp_path / "bare.git"))
+    hecto.copy(bare_repo, dst / "dos", subdirectory="template", quiet=True, **kwargs)
+    assert (dst / "dos" / "version.txt").read_text() == "v2 of hecto"
+
+
+def test_fetch_subdirectory(bare_repo):
+    repo = vcs.fetch(bare_repo, "v1", subdirectory="template")
+    missing = subprocess.check_output(
+        ["git", "-C", repo, "rev-list", "--objects", "--missing=print", "FETCH_HEAD"]
+    ).decode().split()
+    # Only the blob of the README.md
+    assert len([oid for oid in missing if oid.startswith("?")]) == 1
+
+    source = GitSource(repo, "FETCH_HEAD", subdirectory="template")
+    assert source.read_text(source.path / "version.txt.tmpl").startswith("v1")
+    source.close()
+    shutil.rmtree(repo)
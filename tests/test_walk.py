@@ -0,0 +1,66 @@
+from pathlib import Path
+
+import hecto
+from hecto.utils import JinjaRender, Walker
+from hecto.utils import make_filter, make_matcher, make_pruner
+
+
+def make_tree(root, make_folder):
+    for path in [
+        ".git/objects/ab/cdef",
+        ".git/HEAD",
+        ".github/workflows/ci.yml",
+        "node_modules/pkg/lib/index.js",
+        "src/app.py",
+        "README.md",
+    ]:
+        path = root / path
+        make_folder(path.parent)
+        path.write_text(path.name)
+
+
+def walk(root, exclude, include):
+    render = JinjaRender(root)
+    must_filter = make_filter(make_matcher(exclude), make_matcher(include))
+    walker = Walker(root, render, must_filter, make_pruner(exclude, include))
+    folders = {str(rel_folder): files for _, rel_folder, files in walker}
+    return walker, folders
+
+
+def test_prune_excluded_folders(dst, make_folder):
+    make_tree(dst, make_folder)
+    exclude = [".*", ".*/*", "node_modules", "node_modules/*"]
+    walker, folders = walk(dst, exclude, [])
+
+    assert sorted(folders) == [".", "src"]
+    assert walker.pruned == 3
+
+
+def test_prune_honors_include(dst, make_folder):
+    make_tree(dst, make_folder)
+    exclude = [".*", ".*/*"]
+    walker, folders = walk(dst, exclude, [".github/*"])
+
+    assert ".github/workflows" in folders
+    assert not any(folder.startswith(".git/") for folder in folders)
+    assert walker.pruned == 1
+
+
+def test_do_not_prune_partially_excluded_folders(dst, make_folder):
+    make_tree(dst, make_folder)
+    walker, folders = walk(dst, ["node_modules"], [])
+
+    assert "node_modules" not in folders
+    assert "node_modules/pkg" in folders
+    assert walker.pruned == 0
+
+
+def test_copy_with_include_inside_excluded_folder(dst, make_folder):
+    src = Path(dst) / "src"
+    make_tree(src, make_folder)
+    out = Path(dst) / "out"
+    hecto.copy(src, out, include=[".github/*"], quiet=True)
+
+    assert (out / ".github" / "workflows" / "ci.yml").exists()
+    assert not (out / ".git").exists()
+    assert (out / "src" / "app.py").exists()